@@ -0,0 +1,81 @@
+# benchmarks/bench_alias_similarity.py
+"""
+Bandingkan kernel similarity lama (compute_similarity: jaccard + jaro sekaligus,
+tanpa memo) dengan kernel baru (satu metrik, memo LRU, satu nama vs banyak kandidat).
+
+Input: semua alias per cerita di data/4_alias_clustering/string_similarity.csv.
+Setiap alias dibandingkan dengan semua alias lain di cerita yang sama, diulang
+`--rounds` kali seperti saat clustering membandingkan pasangan yang sama berulang kali.
+
+Jalankan dari folder app/:
+    python benchmarks/bench_alias_similarity.py --rounds 3
+"""
+
+import os, sys, ast, time, argparse
+
+import pandas as pd
+import textdistance
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.alias_clustering import similarity, similarity_to_many, normalize
+
+SAMPLE_CSV = os.path.join(os.path.dirname(__file__), "..", "..", "data", "4_alias_clustering", "string_similarity.csv")
+
+def load_aliases():
+    df = pd.read_csv(SAMPLE_CSV)
+    df["aliases"] = df["aliases"].apply(ast.literal_eval)
+    return [
+        list(dict.fromkeys(normalize(a) for aliases in group["aliases"] for a in aliases))
+        for _, group in df.groupby("story_id")
+    ]
+
+def legacy_similarity(s1, s2):
+    return {
+        'jaccard': textdistance.jaccard(s1, s2),
+        'jaro': textdistance.jaro(s1, s2),
+    }
+
+def run_legacy(stories, metric, rounds):
+    scores = {}
+    for _ in range(rounds):
+        for aliases in stories:
+            for name in aliases:
+                for other in aliases:
+                    scores[name, other] = legacy_similarity(name, other)[metric]
+    return scores
+
+def run_kernel(stories, metric, rounds):
+    scores = {}
+    for _ in range(rounds):
+        for aliases in stories:
+            for name in aliases:
+                for other, score in similarity_to_many(name, aliases, metric).items():
+                    scores[name, other] = score
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    stories = load_aliases()
+    pairs = sum(len(aliases) ** 2 for aliases in stories) * args.rounds
+    print(f"{len(stories)} cerita, {sum(map(len, stories))} alias unik, {pairs} perbandingan per metrik")
+
+    for metric in ("jaro", "jaccard"):
+        similarity.cache_clear()
+        start = time.perf_counter()
+        legacy = run_legacy(stories, metric, args.rounds)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kernel = run_kernel(stories, metric, args.rounds)
+        kernel_seconds = time.perf_counter() - start
+
+        assert kernel == legacy, f"{metric}: skor berbeda"
+        print(f"{metric:<8} lama {legacy_seconds:7.3f} s  baru {kernel_seconds:7.3f} s  "
+              f"speedup {legacy_seconds / kernel_seconds:6.2f}x  (memo: {similarity.cache_info().hits} hit)")
+
+if __name__ == "__main__":
+    main()
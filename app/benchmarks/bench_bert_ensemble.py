@@ -0,0 +1,65 @@
+# benchmarks/bench_bert_ensemble.py
+"""
+Bandingkan mode ensemble "sequential" dan "parallel" pada bert_classifier.
+Default-nya sequential; aktifkan parallel (ENSEMBLE_MODE=parallel) hanya bila
+benchmark ini menunjukkan speedup di mesin target.
+
+Input diambil dari kalimat pada
+data/6_character_type_classification/sentence_level/ml/random_forest_prediction.csv.
+Model di-load (dan di-warm-up) sebelum pengukuran, jadi yang diukur murni inferensi.
+
+Jalankan dari folder app/:
+    python benchmarks/bench_bert_ensemble.py --rows 512 --repeat 3
+"""
+
+import os, sys, time, argparse
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.bert_classifier import classify_characters, load_fold_models, ENSEMBLE_MODES, _fold_executor_threads
+
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data",
+    "6_character_type_classification", "sentence_level", "ml", "random_forest_prediction.csv"
+)
+
+OUTPUT_COLS = ["predicted_type", "conf_Lainnya", "conf_Protagonis", "conf_Antagonis"]
+
+def load_sample(rows):
+    df = pd.read_csv(SAMPLE_CSV).head(rows)
+    df["bert_context"] = df["bert_context"].fillna("")
+    for col in ["mention_count", "word_count", "is_primary_in_sentence"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
+    return df[["story_id", "person", "sentence_id", "bert_context",
+               "mention_count", "word_count", "is_primary_in_sentence"]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_sample(args.rows)
+    load_fold_models()
+    classify_characters(df.head(16).copy())  # warm-up
+
+    timings, outputs = {}, {}
+    for mode in ENSEMBLE_MODES:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = classify_characters(df.copy(), ensemble_mode=mode)
+            best = min(best, time.perf_counter() - start)
+        timings[mode], outputs[mode] = best, out[OUTPUT_COLS]
+
+    pd.testing.assert_frame_equal(outputs["sequential"], outputs["parallel"], check_exact=False, atol=1e-5)
+
+    print(f"{len(df)} baris, {os.cpu_count()} core CPU, {_fold_executor_threads()} thread per fold")
+    for mode, seconds in timings.items():
+        print(f"{mode:<10} {seconds:8.3f} s  {len(df) / seconds:8.1f} baris/s")
+    print(f"speedup    {timings['sequential'] / timings['parallel']:8.2f}x  (output identik)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_random_forest.py
+"""
+Bandingkan inferensi Random Forest sklearn (hstack fitur, lalu rf.predict dan
+rf.predict_proba: dua traversal) dengan engine array utils/forest_arrays.py
+(blok kolom tanpa hstack, label & probabilitas dalam satu traversal).
+
+Input: baris data/6_character_type_classification/sentence_level/ml/random_forest_prediction.csv,
+diulang `--scale` kali. Label dan probabilitas kedua jalur harus identik
+bit-per-bit; bila tidak, benchmark gagal.
+
+Jalankan dari folder app/ (RF_ENGINE=numpy untuk engine tanpa kernel C):
+    python benchmarks/bench_random_forest.py --scale 4 --repeat 3
+"""
+
+import os, sys, time, argparse
+
+import numpy as np
+import pandas as pd
+import joblib
+from scipy.sparse import hstack
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.classical_classifier import load_artifacts, export_forest, BEST_MODEL
+
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data",
+    "6_character_type_classification", "sentence_level", "ml", "random_forest_prediction.csv"
+)
+
+NUM_COLS = ["mention_count", "word_count", "is_primary_in_sentence"]
+
+def load_sample(scale):
+    df = pd.read_csv(SAMPLE_CSV)
+    df = pd.concat([df] * scale, ignore_index=True)
+    df["text"] = df["text"].fillna("")
+    for col in NUM_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
+    return df
+
+def best_of(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="berapa kali sampel diulang")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_sample(args.scale)
+    export_forest()
+    forest, tfidf, _ = load_artifacts()
+    rf = joblib.load(BEST_MODEL)
+
+    X_num  = df[NUM_COLS].values
+    X_text = tfidf.transform(df["text"])
+
+    def run_sklearn():
+        X = hstack([X_num, X_text])
+        return rf.predict(X), rf.predict_proba(X)
+
+    def run_engine():
+        return forest.predict_with_proba([X_num, X_text])
+
+    (ref_labels, ref_proba), sklearn_seconds = best_of(run_sklearn, args.repeat)
+    (labels, proba), engine_seconds = best_of(run_engine, args.repeat)
+
+    assert np.array_equal(labels, ref_labels), "label berbeda dari sklearn"
+    assert np.array_equal(proba, ref_proba), \
+        f"probabilitas berbeda dari sklearn (maks selisih {np.abs(proba - ref_proba).max():.3g})"
+
+    trees = len(forest.roots)
+    print(f"{len(df)} baris x {trees} pohon, {len(forest.nodes)} node, engine {forest.engine}; "
+          f"label & probabilitas identik")
+    for name, seconds in (("sklearn", sklearn_seconds), ("engine", engine_seconds)):
+        print(f"{name:<8} {seconds:7.3f} s  {len(df) / seconds:9.0f} baris/s")
+    print(f"speedup {sklearn_seconds / engine_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_service.py
+"""
+Uji beban service/server.py: `--clients` klien bersamaan masing-masing mengirim
+`--requests` permintaan ke satu endpoint, lalu dilaporkan throughput, latensi
+p50/p95/p99 dan statistik micro-batch server (/health).
+
+Input: cerita dari data/3_ner/ground_truth_ner_bio.csv (kata per kalimat digabung spasi).
+Jalankan server lebih dulu, lalu dari folder app/:
+    python service/server.py --no-cache --max-wait-ms 10 &
+    python benchmarks/bench_service.py --endpoint pipeline --clients 8 --requests 4
+
+Bandingkan dengan server tanpa micro-batch (--max-wait-ms 0 --ner-max-sentences 1
+--classify-max-rows 1).
+"""
+
+import os, json, time, argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+GROUND_TRUTH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "3_ner", "ground_truth_ner_bio.csv")
+
+def load_stories(limit=None, max_sentences=None):
+    df = pd.read_csv(GROUND_TRUTH)
+    sentences = df.groupby(["story_id", "sentence_id"], sort=False)["word"].apply(lambda w: " ".join(map(str, w)))
+    stories = sentences.groupby(level="story_id", sort=False).apply(lambda s: " ".join(s.iloc[:max_sentences]))
+    return stories.tolist()[:limit]
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        body = json.loads(response.read())
+    return time.perf_counter() - start, body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="pipeline", choices=["pipeline", "extract_characters"])
+    parser.add_argument("--classifier", default="classical")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=4, help="permintaan per klien")
+    parser.add_argument("--stories", type=int, default=None)
+    parser.add_argument("--max-sentences", type=int, default=None,
+                        help="potong cerita ke N kalimat pertama (permintaan kecil, interaktif)")
+    args = parser.parse_args()
+
+    stories = load_stories(args.stories, args.max_sentences)
+    url = f"{args.url}/{args.endpoint}"
+    payloads = [
+        {"text": stories[i % len(stories)], "story_id": 1, "classifier": args.classifier}
+        for i in range(args.clients * args.requests)
+    ]
+
+    post(url, payloads[0])  # warm-up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        latencies = [seconds for seconds, _ in pool.map(lambda p: post(url, p), payloads)]
+    elapsed = time.perf_counter() - start
+
+    with urllib.request.urlopen(f"{args.url}/health") as response:
+        health = json.loads(response.read())
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{len(payloads)} permintaan /{args.endpoint}, {args.clients} klien: "
+          f"{len(payloads) / elapsed:.2f} req/s dalam {elapsed:.1f} s")
+    print(f"latensi p50 {p50:.2f} s  p95 {p95:.2f} s  p99 {p99:.2f} s  maks {max(latencies):.2f} s")
+    for name, stats in health["batches"].items():
+        print(f"  {name:<24} {stats['batches']:5d} batch  {stats['avg_items_per_batch']:.2f} permintaan/batch")
+
+if __name__ == "__main__":
+    main()
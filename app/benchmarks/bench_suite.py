@@ -0,0 +1,361 @@
+# benchmarks/bench_suite.py
+"""
+Benchmark per tahap pipeline dengan satu perintah: waktu, puncak RSS dan
+baris/detik untuk setiap tahap di setiap skala korpus.
+
+Input: cerita data/3_ner/ground_truth_ner_bio.csv (kata per kalimat digabung
+spasi), direplikasi 1x/10x/100x dengan story_id baru per salinan. Input tiap
+tahap (token, karakter, cluster, enriched, prediksi) dibuat sekali pada skala
+1x lewat run_story (memakai ArtifactCache), lalu direplikasi. Tahap per cerita
+(preprocess, NER, clustering, fitur) diulang per cerita; tahap lain dijalankan
+sekali pada korpus gabungan. Salinan identik ikut memakai memo in-process (mis. cache
+similarity alias), sama seperti cerita berulang di produksi.
+
+Setiap (tahap, skala) berjalan di subprocess tersendiri agar RSS dan cache
+tidak saling mempengaruhi; model dimuat dan dipanaskan sebelum pengukuran.
+Skala yang diperkirakan melebihi `--budget` detik (ekstrapolasi linear dari
+skala sebelumnya) dilewati dan dicatat sebagai "skipped".
+
+Hasil ditulis ke JSON (`--out`). Dengan `--baseline`, hasil dibandingkan dengan
+file baseline dan proses keluar dengan kode 1 bila ada tahap yang lebih lambat
+dari `--tolerance` (atau RSS naik lebih dari `--rss-tolerance`). Setelan yang
+dipakai (engine RF, mode ensemble BERT, backend NER, ...) ikut dicatat, dan
+perbedaannya dengan baseline ditampilkan.
+
+Jalankan dari folder app/ (PYTHONHASHSEED=0 agar clustering deterministik):
+    PYTHONHASHSEED=0 python benchmarks/bench_suite.py --out bench_results.json
+    PYTHONHASHSEED=0 python benchmarks/bench_suite.py --scales 1 10 --baseline benchmarks/baseline.json
+    PYTHONHASHSEED=0 python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+"""
+
+import os, sys, json, time, pickle, shutil, argparse, platform, resource, subprocess, tempfile
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+GROUND_TRUTH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "3_ner", "ground_truth_ner_bio.csv")
+
+# story_id salinan ke-c = story_id asli + c * STORY_ID_OFFSET
+STORY_ID_OFFSET = 1000
+
+# Selisih waktu di bawah ini dianggap noise saat dibandingkan dengan baseline
+NOISE_FLOOR_S = 0.1
+
+# === INPUT ===
+def load_stories(limit=None, max_sentences=None):
+    """Teks cerita dari ground truth NER: list (story_id, judul, teks)."""
+    df = pd.read_csv(GROUND_TRUTH)
+    sentences = df.groupby(["story_id", "sentence_id"], sort=False)["word"].apply(lambda w: " ".join(map(str, w)))
+    texts = sentences.groupby(level="story_id", sort=False).apply(lambda s: " ".join(s.iloc[:max_sentences]))
+    titles = df.groupby("story_id", sort=False)["judul"].first()
+    return [(int(sid), str(titles[sid]), text) for sid, text in texts.items()][:limit]
+
+def build_base_inputs(stories):
+    """Output setiap tahap per cerita pada skala 1x, dari run_story (classical & bert)."""
+    from utils.pipeline import run_story
+    base = []
+    for sid, title, text in stories:
+        classical = run_story(text, story_id=sid, title=title, classifier="classical")
+        bert = run_story(text, story_id=sid, title=title, classifier="bert")
+        base.append({
+            "story_id": sid, "title": title, "text": text,
+            "preprocessed": classical["preprocessed"], "sentences": classical["sentences"],
+            "characters": classical["characters"], "clusters": classical["clusters"],
+            "merged": classical["merged"], "enriched": classical["enriched"],
+            "pred_classical": classical["predictions"], "pred_bert": bert["predictions"],
+        })
+    return base
+
+def replicate(base, scale):
+    """Salin setiap cerita `scale` kali dengan story_id baru per salinan."""
+    copies = []
+    for c in range(scale):
+        for story in base:
+            sid = story["story_id"] + c * STORY_ID_OFFSET
+            copy = dict(story, story_id=sid)
+            for key, value in story.items():
+                if isinstance(value, pd.DataFrame) and "story_id" in value.columns:
+                    copy[key] = value.assign(story_id=sid).astype({"story_id": value["story_id"].dtype})
+            copies.append(copy)
+    return copies
+
+def concat(copies, key):
+    frames = [story[key] for story in copies if not story[key].empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+# === STAGES ===
+# Setiap tahap: (warm-up, siapkan input dari salinan, jalankan -> jumlah baris output)
+def _preprocess():
+    from utils.preprocessing import preprocess_folktale
+    def warm():
+        preprocess_folktale("Alkisah hiduplah seorang raja.", story_id=0)
+    def prepare(copies):
+        return [(s["text"], s["story_id"], s["title"]) for s in copies]
+    def run(items):
+        return sum(len(preprocess_folktale(text, story_id=sid, title=title)[0]) for text, sid, title in items)
+    return warm, prepare, run
+
+def _extract_characters():
+    from utils.predict import extract_characters
+    from utils.pipeline import sentences_from_tokens
+    def warm():
+        extract_characters([["Alkisah", "hiduplah", "seorang", "raja", "."]])
+    def prepare(copies):
+        return [sentences_from_tokens(s["preprocessed"]) for s in copies]
+    def run(items):
+        return sum(len(extract_characters(token_lists)) for token_lists in items)
+    return warm, prepare, run
+
+def _cluster():
+    from utils.alias_clustering import cluster_character_aliases
+    def warm():
+        cluster_character_aliases(["raja", "sang raja"])
+    def prepare(copies):
+        return [s["characters"]["Normalized"].tolist() for s in copies if not s["characters"].empty]
+    def run(items):
+        return sum(len(cluster_character_aliases(names)) for names in items)
+    return warm, prepare, run
+
+def _role_merge():
+    from utils.sense_mapper import apply_role_based_merging
+    def prepare(copies):
+        return concat(copies, "clusters")
+    return (lambda: None), prepare, lambda df: len(apply_role_based_merging(df))
+
+def _features():
+    from utils.feature_engineering import add_features_for_classification
+    # Per cerita seperti di run_story: lookup kalimat & MinMaxScaler di fungsi ini
+    # memakai sentence_id tanpa story_id, jadi korpus gabungan bukan input yang valid
+    def prepare(copies):
+        return [(s["merged"], s["preprocessed"], s["sentences"]) for s in copies if not s["merged"].empty]
+    def run(items):
+        return sum(len(add_features_for_classification(*args)) for args in items)
+    return (lambda: None), prepare, run
+
+def _classify_classical():
+    from utils.classical_classifier import classify_characters, load_artifacts
+    def prepare(copies):
+        return concat(copies, "enriched")
+    return load_artifacts, prepare, lambda df: len(classify_characters(df))
+
+def _classify_bert():
+    from utils.bert_classifier import classify_characters, load_fold_models, load_tokenizer
+    def warm():
+        load_tokenizer()
+        load_fold_models()
+    def prepare(copies):
+        return concat(copies, "enriched")
+    return warm, prepare, lambda df: len(classify_characters(df.copy()))
+
+def _majority_vote():
+    from utils.majority_vote import run_majority_vote
+    def prepare(copies):
+        return concat(copies, "pred_classical"), concat(copies, "enriched")
+    return (lambda: None), prepare, lambda args: len(run_majority_vote(*args)["final"])
+
+def _confidence_vote():
+    from utils.confidence_vote import confidence_weighted_vote
+    def prepare(copies):
+        return concat(copies, "pred_bert")
+    return (lambda: None), prepare, lambda df: len(confidence_weighted_vote(df.copy()))
+
+STAGES = {
+    "preprocess_folktale": _preprocess,
+    "extract_characters": _extract_characters,
+    "cluster_character_aliases": _cluster,
+    "apply_role_based_merging": _role_merge,
+    "add_features_for_classification": _features,
+    "classify_classical": _classify_classical,
+    "classify_bert": _classify_bert,
+    "run_majority_vote": _majority_vote,
+    "confidence_weighted_vote": _confidence_vote,
+}
+
+# === MEASUREMENT ===
+def peak_rss_mb():
+    # VmHWM di-reset saat exec; ru_maxrss di Linux mewarisi puncak proses induk
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss: KiB di Linux, byte di macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def measure(stage, scale, base_path, repeat=1):
+    """Dijalankan di subprocess: ukur satu tahap pada satu skala (waktu terbaik dari `repeat`)."""
+    with open(base_path, "rb") as f:
+        base = pickle.load(f)
+    warm, prepare, run = STAGES[stage]()
+    warm()
+    inputs = prepare(replicate(base, scale))
+    rss_before = peak_rss_mb()
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = run(inputs)
+        seconds = min(seconds, time.perf_counter() - start)
+    peak = peak_rss_mb()
+    return {
+        "stage": stage, "scale": scale, "status": "ok",
+        "stories": len(base) * scale, "rows": int(rows), "seconds": round(seconds, 4),
+        "rows_per_s": round(rows / seconds, 1) if seconds > 0 else None,
+        "peak_rss_mb": round(peak, 1), "rss_delta_mb": round(peak - rss_before, 1),
+    }
+
+def run_worker(stage, scale, base_path, repeat):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", stage, str(scale), base_path, str(repeat)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        error = proc.stderr.strip()[-2000:] or f"keluar dengan kode {proc.returncode}"
+        return {"stage": stage, "scale": scale, "status": "failed", "error": error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def run_suite(stages, scales, base_path, budget, repeat):
+    results = []
+    for stage in stages:
+        previous = None
+        for scale in sorted(scales):
+            if previous is not None and previous["status"] != "ok":
+                result = {"stage": stage, "scale": scale, "status": "skipped",
+                          "reason": f"skala {previous['scale']} {previous['status']}"}
+            elif previous is not None and previous["seconds"] * scale / previous["scale"] > budget:
+                estimate = previous["seconds"] * scale / previous["scale"]
+                result = {"stage": stage, "scale": scale, "status": "skipped",
+                          "reason": f"perkiraan {estimate:.0f} s > budget {budget:.0f} s"}
+            else:
+                result = run_worker(stage, scale, base_path, repeat)
+            print(format_result(result), flush=True)
+            results.append(result)
+            previous = result
+    return results
+
+# === REPORT ===
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def effective_settings():
+    """Nilai yang benar-benar dipakai tiap tahap (default modul + override env)."""
+    from utils.preprocessing import PREPROCESS_TOKENIZER
+    from utils.predict import NER_BACKEND, NER_BATCH_SIZE
+    from utils.forest_arrays import resolve_engine
+    from utils.bert_classifier import ENSEMBLE_MODE, BERT_QUANTIZE, DEVICE
+    return {
+        "preprocess_tokenizer": PREPROCESS_TOKENIZER,
+        "ner_backend": NER_BACKEND,
+        "ner_batch_size": NER_BATCH_SIZE,
+        "rf_engine": resolve_engine(),
+        "bert_ensemble_mode": ENSEMBLE_MODE,
+        "bert_quantize": BERT_QUANTIZE,
+        "bert_device": DEVICE.type,
+    }
+
+def run_metadata(stories):
+    env_keys = ("PYTHONHASHSEED", "PREPROCESS_TOKENIZER", "NER_BACKEND",
+                "RF_ENGINE", "BERT_QUANTIZE", "ENSEMBLE_MODE")
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "base_stories": len(stories),
+        "settings": effective_settings(),
+        "env": {key: os.environ[key] for key in env_keys if key in os.environ},
+    }
+
+def format_result(result):
+    head = f"{result['stage']:<32} {result['scale']:>4}x"
+    if result["status"] != "ok":
+        detail = result.get("reason") or result["error"].splitlines()[-1]
+        return f"{head}  {result['status']}: {detail}"
+    return (f"{head} {result['seconds']:9.3f} s {result['rows']:9d} baris "
+            f"{result['rows_per_s'] or 0:11.1f} baris/s  RSS {result['peak_rss_mb']:7.1f} MB "
+            f"(+{result['rss_delta_mb']:.1f})")
+
+def compare(results, meta, baseline, tolerance, rss_tolerance):
+    """Bandingkan dengan baseline; kembalikan daftar regresi."""
+    reference = {(r["stage"], r["scale"]): r for r in baseline["results"] if r["status"] == "ok"}
+    regressions = []
+    print(f"\nvs baseline {baseline['meta'].get('git_commit')} ({baseline['meta'].get('date')}):")
+    base_settings = baseline["meta"].get("settings", {})
+    for key, value in meta["settings"].items():
+        if key in base_settings and base_settings[key] != value:
+            print(f"  PERHATIAN: {key} berbeda (baseline {base_settings[key]!r}, sekarang {value!r})")
+    for result in results:
+        ref = reference.get((result["stage"], result["scale"]))
+        if ref is None or result["status"] != "ok":
+            continue
+        time_ratio = result["seconds"] / ref["seconds"] if ref["seconds"] > 0 else 1.0
+        rss_ratio = result["peak_rss_mb"] / ref["peak_rss_mb"] if ref["peak_rss_mb"] > 0 else 1.0
+        flags = []
+        if time_ratio > 1 + tolerance and result["seconds"] - ref["seconds"] > NOISE_FLOOR_S:
+            flags.append("LEBIH LAMBAT")
+        if rss_ratio > 1 + rss_tolerance:
+            flags.append("RSS NAIK")
+        print(f"  {result['stage']:<32} {result['scale']:>4}x  waktu {time_ratio:5.2f}x  RSS {rss_ratio:5.2f}x"
+              f"  {' '.join(flags)}")
+        if flags:
+            regressions.append({**result, "time_ratio": round(time_ratio, 3), "rss_ratio": round(rss_ratio, 3)})
+    return regressions
+
+def write_json(path, payload):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+def main():
+    if len(sys.argv) == 6 and sys.argv[1] == "--worker":
+        print(json.dumps(measure(sys.argv[2], int(sys.argv[3]), sys.argv[4], int(sys.argv[5]))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--stories", type=int, default=None, help="batasi jumlah cerita dasar")
+    parser.add_argument("--budget", type=float, default=600,
+                        help="lewati skala yang diperkirakan lebih lama dari N detik per tahap")
+    parser.add_argument("--repeat", type=int, default=1, help="ambil waktu terbaik dari N kali jalan")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="batas perlambatan relatif (0.2 = 20%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", default=None, help="simpan hasil juga sebagai baseline di path ini")
+    args = parser.parse_args()
+
+    stories = load_stories(args.stories)
+    print(f"Menyiapkan input dasar dari {len(stories)} cerita ...", flush=True)
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        base_path = os.path.join(workdir, "base.pkl")
+        with open(base_path, "wb") as f:
+            pickle.dump(build_base_inputs(stories), f)
+        results = run_suite(args.stages, args.scales, base_path, args.budget, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    payload = {"meta": run_metadata(stories), "results": results}
+    write_json(args.out, payload)
+    print(f"Hasil disimpan ke {args.out}")
+    if args.save_baseline:
+        write_json(args.save_baseline, payload)
+        print(f"Baseline disimpan ke {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, payload["meta"], json.load(f), args.tolerance, args.rss_tolerance)
+        if regressions:
+            print(f"{len(regressions)} regresi terhadap baseline")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 pd.options.display.float_format = "{:.10f}".format 
 import plotly.express as px
 
-from utils.preprocessing          import preprocess_folktale
-from utils.feature_engineering    import add_features_for_classification
+import json
 from utils.prepare_sentence_level import build_sentence_level_dataset   # <-- keep if you still need it elsewhere
+from utils.artifact_cache         import ARTIFACT_CACHE, story_hash
+from utils.pipeline               import (stage_configs, lazy_preprocess, stage_ner, stage_cluster,
+                                          stage_role_merge, stage_features, stage_classify, stage_vote)
 
 st.set_page_config(page_title="Klasifikasi Tokoh Cerita Rakyat", layout="centered")
 st.title("🧙‍♀️ Klasifikasi Tokoh dalam Cerita Rakyat Nusantara")
@@ -17,6 +19,34 @@ st.caption("Dibuat oleh Rayssa Ravelia – NRP 5025211219")
 
 st.subheader("Unggah atau tempelkan teks cerita rakyat untuk memulai")
 
+# =========  STAGE CACHE  ======================================================
+CACHE_STATUS = {
+    "memory"  : "⚡ cache memori",
+    "disk"    : "💾 cache disk",
+    "computed": "🔄 dihitung",
+}
+
+def cached_stage(stage, compute):
+    """
+    Jalankan satu tahap pipeline sekali per input (teks cerita + konfigurasi tahap).
+    Hasil disimpan di memori sesi, sehingga rerun akibat interaksi widget tidak
+    menjalankan ulang NER dkk., dan di ArtifactCache (disk) untuk sesi lain.
+    """
+    story_text = st.session_state["story_text"]
+    config     = st.session_state["stage_configs"][stage]
+    key  = (stage, story_hash(story_text), json.dumps(config, sort_keys=True, default=str))
+    memo = st.session_state.setdefault("stage_memo", {})
+
+    if key in memo:
+        status = "memory"
+    else:
+        df, hit   = ARTIFACT_CACHE.cached(stage, story_text, compute, config)
+        memo[key] = df
+        status    = "disk" if hit else "computed"
+
+    st.caption(f"{CACHE_STATUS[status]} · tahap `{stage}`")
+    return memo[key]
+
 # =========  INPUT AREA  =======================================================
 title_input = st.text_input("📝 Judul Cerita  (Optional)", placeholder="contoh: Ikan Ajaib")
 
@@ -39,14 +69,24 @@ if story_text:
 
     if st.button("➡️ Pra-pemrosesan & Klasifikasi"):
         with st.spinner("Sedang memproses cerita..."):
-            title            = title_input.strip() or "uploaded"
-            preprocessed_df  = preprocess_folktale(story_text, story_id=1, title=title)
+            title = title_input.strip() or "uploaded"
+            # Simpan teks & konfigurasi yang diproses; menjadi key cache untuk semua tahap
+            st.session_state["story_text"]    = story_text
+            st.session_state["stage_configs"] = stage_configs(story_id=1, title=title)
+            st.session_state["stage_memo"]    = {}
+            for key in ("enriched_df", "merged_df", "prediction_df", "final_df"):
+                st.session_state.pop(key, None)
+            preprocess      = lazy_preprocess(story_text, 1, title)
+            preprocessed_df = cached_stage("preprocess", lambda: preprocess("tokens"))
+            sentences_df    = cached_stage("sentences", lambda: preprocess("sentences"))
             st.session_state["preprocessed_df"] = preprocessed_df
+            st.session_state["sentences_df"]    = sentences_df
             st.success("Pra-pemrosesan selesai!")
 
     # -------------------------------------------------------------------------
     if "preprocessed_df" in st.session_state:
         preprocessed_df = st.session_state["preprocessed_df"]
+        sentences_df    = st.session_state["sentences_df"]
 
         st.markdown("### 🧾 Pratinjau Tokenisasi (50 Baris Pertama)")
         st.dataframe(preprocessed_df.head(50))
@@ -55,9 +95,8 @@ if story_text:
                            f"tokenisasi_cerita_{clean_title}.csv", "text/csv")
 
         # ---------------------  NER Character Extraction  ---------------------
-        from utils.predict import extract_characters
-        sentences     = preprocessed_df.groupby("sentence_id")["word"].apply(list).tolist()
-        character_df  = extract_characters(sentences)
+        ner_backend  = st.session_state["stage_configs"]["ner"]["ner_backend"]
+        character_df = cached_stage("ner", lambda: stage_ner(preprocessed_df, ner_backend))
         st.session_state["character_df"] = character_df
 
         st.markdown("### 🧑‍🤝‍🧑 Tokoh yang Terdeteksi (dengan Alias yang Dinormalisasi)")
@@ -69,10 +108,9 @@ if story_text:
                                f"daftar_tokoh_dinormalisasi_{clean_title}.csv", "text/csv")
 
             # --------------------  Alias Clustering  --------------------------
-            from utils.alias_clustering import cluster_character_aliases
-            clusters   = cluster_character_aliases(character_df["Normalized"].tolist())
-            cluster_df = pd.DataFrame([{"Cluster": k, "Aliases": ", ".join(v)}
-                                       for k, v in clusters.items()])
+            alias_cluster_input = cached_stage("cluster", lambda: stage_cluster(character_df, 1))
+            cluster_df = pd.DataFrame({"Cluster": alias_cluster_input["person"],
+                                       "Aliases": alias_cluster_input["aliases"].map(", ".join)})
             st.markdown("### 🧩 Klaster Alias (Tokoh yang Dikelompokkan)")
             st.dataframe(cluster_df)
             st.download_button("📥 Unduh Klaster Alias (CSV)",
@@ -80,26 +118,10 @@ if story_text:
                                f"klaster_alias_{clean_title}.csv", "text/csv")
 
             # --------------------  Sense Mapping  -----------------------------
-            from utils.sense_mapper import apply_role_based_merging
-            alias_cluster_input = pd.DataFrame(
-                {"story_id": 1, "person": k, "aliases": v} for k, v in clusters.items()
-            )
-            merged_df = apply_role_based_merging(alias_cluster_input)
+            # (termasuk menempelkan sentence_ids ke setiap Tokoh)
+            merged_df = cached_stage("role_merge", lambda: stage_role_merge(alias_cluster_input, character_df))
             st.session_state["merged_df"] = merged_df
 
-            # -----------  attach sentence_ids to every Tokoh  -----------------
-            alias_sent_map = (
-                character_df[["Normalized", "sentence_id"]]
-                    .explode("Normalized").dropna()
-                    .groupby("Normalized")["sentence_id"]
-                    .agg(lambda x: sorted(set(x))).to_dict()
-            )
-            merged_df["sentence_ids"] = merged_df["aliases"].apply(
-                lambda alist: sorted({sid
-                                      for alias in alist
-                                      for sid in alias_sent_map.get(alias, [])})
-            )
-
             st.markdown("### 🧠 Klaster Berbasis Peran (Penggabungan Berdasarkan Peran Tokoh)")
             st.dataframe(merged_df)
             st.download_button("📥 Unduh Klaster Peran (CSV)",
@@ -107,7 +129,7 @@ if story_text:
                                f"klaster_alias_berdasarkan_peran_{clean_title}.csv", "text/csv")
 
             # ------------------  Feature Engineering  ------------------------
-            enriched_df = add_features_for_classification(merged_df, preprocessed_df)
+            enriched_df = cached_stage("features", lambda: stage_features(merged_df, preprocessed_df, sentences_df))
             st.session_state["enriched_df"] = enriched_df
 
             st.markdown("### 🧬 Dataset Kalimat yang Telah Diperkaya (50 Baris Pertama)")
@@ -143,20 +165,25 @@ if story_text:
         selected_display = st.selectbox("Select a model:", model_display_options, index=model_display_options.index(current_display))
         st.session_state["model_tag"] = model_display_to_tag[selected_display]
 
+        # Mode kuantisasi int8 hanya berlaku untuk model BERT (inferensi CPU lebih cepat)
+        if st.session_state["model_tag"] == "bert":
+            st.checkbox("⚡ Mode cepat: kuantisasi int8 (CPU)", key="bert_quantize")
+
         if st.button("🔍 Jalankan Klasifikasi Tokoh"):
             with st.spinner("Sedang mengklasifikasikan tokoh..."):
-                if st.session_state["model_tag"] == "classical":
-                    from utils.classical_classifier import classify_characters
-                    prediction_df = classify_characters(enriched_df)
+                model_tag = st.session_state["model_tag"]
+                quantize  = model_tag == "bert" and st.session_state.get("bert_quantize", False)
 
-                    from utils.majority_vote import run_majority_vote
-                    final_df = run_majority_vote(prediction_df, enriched_df)
-                else:
-                    from utils.bert_classifier import classify_characters
-                    prediction_df = classify_characters(enriched_df)
+                # Tambahkan konfigurasi tahap klasifikasi & voting untuk model terpilih
+                configs = stage_configs(story_id=1, classifier=model_tag, quantize=quantize)
+                st.session_state["stage_configs"].update(
+                    {k: v for k, v in configs.items() if k.startswith(("classify_", "vote_"))}
+                )
 
-                    from utils.confidence_vote import confidence_weighted_vote
-                    final_df = confidence_weighted_vote(prediction_df)
+                prediction_df = cached_stage(f"classify_{model_tag}",
+                                             lambda: stage_classify(enriched_df, model_tag, quantize))
+                final_df      = cached_stage(f"vote_{model_tag}",
+                                             lambda: stage_vote(prediction_df, enriched_df, model_tag))
 
             st.success("Klasifikasi selesai!")
 
@@ -166,7 +193,8 @@ if story_text:
 
         if "prediction_df" in st.session_state and "final_df" in st.session_state:
             prediction_df = st.session_state["prediction_df"]
-            final_df = st.session_state["final_df"]
+            # Salinan: frame aslinya juga diserahkan ke output sink (bisa masih ditulis di background)
+            final_df = st.session_state["final_df"].copy()
             model_tag = st.session_state["model_tag"]
 
             st.markdown("### 📌 Hasil Klasifikasi")
@@ -0,0 +1,72 @@
+# scripts/eval_bert_quantized.py
+"""
+Bandingkan ensemble IndoBERT fp32 dan int8 (dynamic quantization) terhadap
+data/6_character_type_classification/sentence_level/ground_truth_sentence_level.csv.
+
+Dilaporkan macro-F1 terhadap ground truth, kesepakatan label int8 vs fp32,
+selisih confidence maksimum, dan waktu inferensi.
+
+Jalankan dari folder app/:
+    python scripts/eval_bert_quantized.py
+"""
+
+import os, sys, time, argparse
+
+import pandas as pd
+from sklearn.metrics import f1_score
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.bert_classifier import classify_characters, load_fold_models
+
+GROUND_TRUTH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data",
+    "6_character_type_classification", "sentence_level", "ground_truth_sentence_level.csv"
+)
+
+LABEL_MAP = {"others": "Lainnya", "protagonist": "Protagonis", "antagonist": "Antagonis"}
+CONF_COLS = ["conf_Lainnya", "conf_Protagonis", "conf_Antagonis"]
+
+def load_ground_truth(path=GROUND_TRUTH, rows=None):
+    df = pd.read_csv(path)
+    if rows:
+        df = df.head(rows)
+    df["bert_context"] = df["bert_context"].fillna("")
+    df["is_primary_in_sentence"] = df["is_primary_in_sentence"].astype(float)
+    # Skala fitur numerik seperti pada add_features_for_classification
+    df[["mention_count", "word_count"]] = MinMaxScaler().fit_transform(df[["mention_count", "word_count"]])
+    df["label"] = df["type"].map(LABEL_MAP)
+    return df.reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=None)
+    args = parser.parse_args()
+
+    df = load_ground_truth(rows=args.rows)
+
+    results, rows = {}, []
+    for quantize in (False, True):
+        load_fold_models(quantize=quantize)  # load/quantize di luar pengukuran waktu
+        start = time.perf_counter()
+        out = classify_characters(df.copy(), quantize=quantize)
+        elapsed = time.perf_counter() - start
+        results[quantize] = out
+
+        rows.append({
+            "mode"     : "int8" if quantize else "fp32",
+            "macro_f1" : f1_score(df["label"], out["predicted_type"], average="macro"),
+            "seconds"  : elapsed,
+            "rows_per_s": len(df) / elapsed,
+        })
+
+    fp32, int8 = results[False], results[True]
+    report = pd.DataFrame(rows)
+    print(f"{len(df)} kalimat dievaluasi")
+    print(report.to_string(index=False, float_format="{:.4f}".format))
+    print(f"kesepakatan label int8 vs fp32 : {(fp32['predicted_type'] == int8['predicted_type']).mean():.4f}")
+    print(f"selisih confidence maksimum    : {(fp32[CONF_COLS] - int8[CONF_COLS]).abs().max().max():.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# scripts/eval_ner_backends.py
+"""
+Parity check backend NER (torch / onnx / onnx-int8) terhadap
+data/3_ner/ground_truth_ner_bio.csv.
+
+Untuk setiap backend dilaporkan entity-level precision/recall/F1 terhadap
+ground truth, F1 terhadap backend eager (torch) sebagai baseline, dan
+latensi per kalimat (mean / p50 / p95).
+
+Jalankan dari folder app/:
+    python scripts/eval_ner_backends.py --backends torch onnx onnx-int8
+"""
+
+import os, sys, time, argparse
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.predict import load_ner_pipeline, NER_BACKENDS
+
+GROUND_TRUTH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "3_ner", "ground_truth_ner_bio.csv")
+
+def load_ground_truth(path=GROUND_TRUTH, max_sentences=None):
+    """Kembalikan list (kalimat, Counter entitas gold) per (story_id, sentence_id)."""
+    df = pd.read_csv(path).dropna(subset=["word"])
+    df["word"] = df["word"].astype(str)
+    df["type"] = df["type"].fillna("O")
+
+    samples = []
+    for _, sent in df.groupby(["story_id", "sentence_id"], sort=False):
+        words, tags = sent["word"].tolist(), sent["type"].tolist()
+        entities, current = [], []
+        for word, tag in zip(words, tags):
+            if tag.startswith("B-") or (tag.startswith("I-") and not current):
+                if current:
+                    entities.append(" ".join(current))
+                current = [word]
+            elif tag.startswith("I-"):
+                current.append(word)
+            else:
+                if current:
+                    entities.append(" ".join(current))
+                current = []
+        if current:
+            entities.append(" ".join(current))
+
+        samples.append((" ".join(words), Counter(e.lower() for e in entities)))
+        if max_sentences and len(samples) >= max_sentences:
+            break
+    return samples
+
+def predict_entities(ner_pipeline, sentences):
+    """Jalankan NER per kalimat; kembalikan (list Counter entitas, list latensi detik)."""
+    predictions, latencies = [], []
+    for sentence in sentences:
+        start = time.perf_counter()
+        preds = ner_pipeline(sentence)
+        latencies.append(time.perf_counter() - start)
+        predictions.append(Counter(
+            p["word"].replace("##", "").strip().lower()
+            for p in preds if p["entity_group"] == "PER"
+        ))
+    return predictions, latencies
+
+def entity_f1(predicted, reference):
+    tp = fp = fn = 0
+    for pred, ref in zip(predicted, reference):
+        hit = sum((pred & ref).values())
+        tp += hit
+        fp += sum(pred.values()) - hit
+        fn += sum(ref.values()) - hit
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall    = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(NER_BACKENDS), choices=NER_BACKENDS)
+    parser.add_argument("--max-sentences", type=int, default=None)
+    parser.add_argument("--out", default=None, help="simpan ringkasan ke CSV")
+    args = parser.parse_args()
+
+    samples   = load_ground_truth(max_sentences=args.max_sentences)
+    sentences = [s for s, _ in samples]
+    gold      = [g for _, g in samples]
+
+    baseline, rows = None, []
+    for backend in args.backends:
+        ner_pipeline = load_ner_pipeline(backend)
+        ner_pipeline(sentences[0])  # warm-up
+        predictions, latencies = predict_entities(ner_pipeline, sentences)
+        if backend == "torch":
+            baseline = predictions
+
+        precision, recall, f1 = entity_f1(predictions, gold)
+        lat_ms = np.array(latencies) * 1000
+        rows.append({
+            "backend"        : backend,
+            "precision"      : precision,
+            "recall"         : recall,
+            "f1"             : f1,
+            "f1_vs_torch"    : entity_f1(predictions, baseline)[2] if baseline is not None else np.nan,
+            "latency_mean_ms": lat_ms.mean(),
+            "latency_p50_ms" : np.percentile(lat_ms, 50),
+            "latency_p95_ms" : np.percentile(lat_ms, 95),
+        })
+
+    report = pd.DataFrame(rows)
+    print(f"{len(sentences)} kalimat dievaluasi")
+    print(report.to_string(index=False, float_format="{:.4f}".format))
+    if args.out:
+        report.to_csv(args.out, index=False)
+
+if __name__ == "__main__":
+    main()
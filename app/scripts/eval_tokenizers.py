@@ -0,0 +1,116 @@
+# scripts/eval_tokenizers.py
+"""
+Benchmark & agreement tokenizer preprocessing ("regex" vs "nltk") pada
+data/1_raw/Dataset Cerita Rakyat.xlsx.
+
+Per tokenizer dilaporkan waktu total dan token/detik. Untuk "regex" juga
+dilaporkan agreement terhadap NLTK:
+  - token-level precision/recall/F1 (token disejajarkan per cerita dengan difflib),
+  - persentase cerita dengan token identik,
+  - kalimat NLTK yang dihasilkan persis sama, dan rasio jumlah kalimat.
+
+Jalankan dari folder app/:
+    python scripts/eval_tokenizers.py --repeat 3 --out tokenizer_agreement.csv
+"""
+
+import os, sys, time, argparse
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.preprocessing import clean_text, tokenize_text, TOKENIZERS
+
+RAW_DATASET = os.path.join(os.path.dirname(__file__), "..", "..", "data", "1_raw", "Dataset Cerita Rakyat.xlsx")
+
+def load_texts(path=RAW_DATASET, limit=None):
+    df = pd.read_excel(path).dropna(subset=["text"])
+    return [clean_text(str(text)) for text in df["text"].tolist()[:limit]]
+
+def time_tokenizer(texts, tokenizer, repeat):
+    """Kembalikan (hasil per cerita, waktu terbaik dalam detik)."""
+    tokenize_text(texts[0], tokenizer)  # warm-up (load data punkt / compile regex)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [tokenize_text(text, tokenizer) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return results, best
+
+def agreement(results, reference):
+    matched = predicted = expected = identical = 0
+    same_sentences = reference_sentences = sentence_count = 0
+    per_story = []
+    for story, (sentences, ref_sentences) in enumerate(zip(results, reference)):
+        words     = [w for _, ws in sentences for w in ws]
+        ref_words = [w for _, ws in ref_sentences for w in ws]
+        hit = sum(b.size for b in SequenceMatcher(None, words, ref_words, autojunk=False).get_matching_blocks())
+        matched, predicted, expected = matched + hit, predicted + len(words), expected + len(ref_words)
+        identical += words == ref_words
+
+        ref_set = {s for s, _ in ref_sentences}
+        same = sum(s in ref_set for s, _ in sentences)
+        same_sentences += same
+        reference_sentences += len(ref_sentences)
+        sentence_count += len(sentences)
+        per_story.append({
+            "story"          : story,
+            "tokens"         : len(words),
+            "tokens_nltk"    : len(ref_words),
+            "token_matches"  : hit,
+            "sentences"      : len(sentences),
+            "sentences_nltk" : len(ref_sentences),
+            "sentence_matches": same,
+        })
+
+    precision = matched / predicted if predicted else 0.0
+    recall    = matched / expected if expected else 0.0
+    summary = {
+        "token_precision"      : precision,
+        "token_recall"         : recall,
+        "token_f1"             : 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "identical_stories"    : identical / len(results) if results else 0.0,
+        "sentence_exact_match" : same_sentences / reference_sentences if reference_sentences else 0.0,
+        "sentence_count_ratio" : sentence_count / reference_sentences if reference_sentences else 0.0,
+    }
+    return summary, pd.DataFrame(per_story)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokenizers", nargs="+", default=list(TOKENIZERS), choices=TOKENIZERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--out", default=None, help="simpan agreement per cerita ke CSV")
+    args = parser.parse_args()
+
+    texts = load_texts(limit=args.limit)
+    outputs, rows = {}, []
+    for tokenizer in args.tokenizers:
+        results, seconds = time_tokenizer(texts, tokenizer, args.repeat)
+        outputs[tokenizer] = results
+        tokens = sum(len(ws) for sentences in results for _, ws in sentences)
+        rows.append({
+            "tokenizer"    : tokenizer,
+            "seconds"      : seconds,
+            "tokens"       : tokens,
+            "tokens_per_s" : tokens / seconds if seconds else float("inf"),
+            "sentences"    : sum(map(len, results)),
+        })
+
+    print(f"{len(texts)} cerita")
+    print(pd.DataFrame(rows).to_string(index=False, float_format="{:.4f}".format))
+
+    if "nltk" in outputs:
+        for tokenizer, results in outputs.items():
+            if tokenizer == "nltk":
+                continue
+            summary, per_story = agreement(results, outputs["nltk"])
+            print(f"\nAgreement {tokenizer} vs nltk")
+            for name, value in summary.items():
+                print(f"  {name:<22} {value:.4f}")
+            if args.out:
+                per_story.to_csv(args.out, index=False)
+
+if __name__ == "__main__":
+    main()
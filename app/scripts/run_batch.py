@@ -0,0 +1,205 @@
+# scripts/run_batch.py
+"""
+Jalankan seluruh pipeline untuk banyak cerita sekaligus, tanpa Streamlit.
+
+Input berupa folder berisi file .txt (satu cerita per file, story_id = nama file)
+atau file Excel seperti data/1_raw/Dataset Cerita Rakyat.xlsx (kolom `judul` & `text`,
+story_id = nomor baris mulai dari 1).
+
+Cerita diproses paralel di process pool; model di-load sekali per worker. Hasil
+setiap cerita ditulis ke `<output>/<story_id>/` begitu selesai, dan progres dicatat
+di `<output>/progress.jsonl`. Bila proses terhenti, jalankan ulang perintah yang
+sama: cerita yang sudah selesai akan dilewati.
+
+Jalankan dari folder app/:
+    python scripts/run_batch.py --output ../runs/korpus --workers 4
+    python scripts/run_batch.py --input cerita/ --output ../runs/txt --classifier bert
+    python scripts/run_batch.py --output ../runs/panjang --stream --window 64   # cerita sangat panjang
+"""
+
+import os, sys, json, time, shutil, argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.pipeline import run_story, CLASSIFIERS
+
+DEFAULT_INPUT = os.path.join(os.path.dirname(__file__), "..", "..", "data", "1_raw", "Dataset Cerita Rakyat.xlsx")
+PROGRESS_FILE = "progress.jsonl"
+DONE_MARKER   = "_SUCCESS"
+
+# Frame yang selalu ditulis; --all-stages menulis semua frame hasil pipeline
+DEFAULT_OUTPUTS = ("predictions", "final")
+ALL_STAGES      = ("preprocessed", "sentences", "characters", "clusters", "merged", "enriched") + DEFAULT_OUTPUTS
+
+# Mode --stream hanya menyimpan agregat, jadi frame per kalimat tidak tersedia
+STREAM_OUTPUTS    = ("final",)
+STREAM_ALL_STAGES = ("characters", "clusters", "merged", "final")
+
+# === INPUT ===
+def load_stories(path):
+    """Kembalikan list (story_id, judul, teks)."""
+    if os.path.isdir(path):
+        stories = []
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(path, filename), encoding="utf-8") as f:
+                    stem = os.path.splitext(filename)[0]
+                    stories.append((stem, stem, f.read()))
+        return stories
+
+    df = pd.read_excel(path)
+    df = df.dropna(subset=["text"])
+    return [(str(idx + 1), str(row.judul), str(row.text)) for idx, row in df.iterrows()]
+
+# === WORKER ===
+_WORKER_CONFIG = {}
+
+def _init_worker(classifier, ner_backend, quantize, threads, use_cache, stream_window=None):
+    import torch
+    torch.set_num_threads(threads)
+
+    _WORKER_CONFIG.update(classifier=classifier, ner_backend=ner_backend,
+                          quantize=quantize, use_cache=use_cache, stream_window=stream_window)
+
+    # Load model sekali per worker, bukan per cerita
+    from utils.predict import load_ner_pipeline, NER_BACKEND
+    load_ner_pipeline(ner_backend or NER_BACKEND)
+    if classifier == "bert":
+        from utils.bert_classifier import load_fold_models, load_tokenizer
+        load_tokenizer()
+        load_fold_models(quantize=quantize)
+    else:
+        from utils.classical_classifier import load_artifacts
+        load_artifacts()
+
+def _process_story(story_id, title, text, output_dir, outputs):
+    from utils.artifact_cache import ARTIFACT_CACHE
+
+    start = time.perf_counter()
+    if _WORKER_CONFIG["stream_window"]:
+        from utils.streaming import run_story_streaming
+        results = run_story_streaming(
+            text, story_id=story_id,
+            classifier=_WORKER_CONFIG["classifier"],
+            ner_backend=_WORKER_CONFIG["ner_backend"],
+            quantize=_WORKER_CONFIG["quantize"],
+            window=_WORKER_CONFIG["stream_window"],
+        )
+    else:
+        results = run_story(
+            text, story_id=story_id, title=title,
+            classifier=_WORKER_CONFIG["classifier"],
+            ner_backend=_WORKER_CONFIG["ner_backend"],
+            quantize=_WORKER_CONFIG["quantize"],
+            cache=ARTIFACT_CACHE if _WORKER_CONFIG["use_cache"] else None,
+        )
+
+    # Tulis ke folder sementara lalu rename, jadi folder cerita selalu lengkap atau tidak ada
+    story_dir = os.path.join(output_dir, story_id)
+    tmp_dir = f"{story_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in outputs:
+        results[name].to_csv(os.path.join(tmp_dir, f"{name}.csv"), index=False)
+    open(os.path.join(tmp_dir, DONE_MARKER), "w").close()
+    shutil.rmtree(story_dir, ignore_errors=True)
+    os.replace(tmp_dir, story_dir)
+
+    return {
+        "story_id"  : story_id,
+        "status"    : "done",
+        "characters": len(results["final"]),
+        "sentences" : len(results["sentences"]) if "sentences" in results else None,
+        "seconds"   : round(time.perf_counter() - start, 3),
+    }
+
+# === CHECKPOINTS ===
+def completed_stories(output_dir):
+    if not os.path.isdir(output_dir):
+        return set()
+    return {
+        entry.name for entry in os.scandir(output_dir)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, DONE_MARKER))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="folder .txt atau file .xlsx")
+    parser.add_argument("--output", required=True, help="folder hasil per cerita")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--classifier", default="classical", choices=CLASSIFIERS)
+    parser.add_argument("--ner-backend", default=None)
+    parser.add_argument("--quantize", action="store_true", help="kuantisasi int8 untuk BERT")
+    parser.add_argument("--all-stages", action="store_true", help="tulis output semua tahap")
+    parser.add_argument("--no-cache", action="store_true", help="jangan gunakan ArtifactCache")
+    parser.add_argument("--stream", action="store_true",
+                        help="mode streaming per jendela kalimat (memori terbatas, tanpa cache)")
+    parser.add_argument("--window", type=int, default=None, help="jumlah kalimat per jendela untuk --stream")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    stories = load_stories(args.input)[:args.limit]
+    os.makedirs(args.output, exist_ok=True)
+
+    done = completed_stories(args.output)
+    pending = [s for s in stories if s[0] not in done]
+    print(f"{len(stories)} cerita, {len(done & {s[0] for s in stories})} sudah selesai, {len(pending)} diproses")
+    if not pending:
+        return
+
+    stream_window = None
+    if args.stream:
+        from utils.streaming import STREAM_WINDOW
+        stream_window = args.window or STREAM_WINDOW
+        outputs = STREAM_ALL_STAGES if args.all_stages else STREAM_OUTPUTS
+    else:
+        outputs = ALL_STAGES if args.all_stages else DEFAULT_OUTPUTS
+    workers = max(1, min(args.workers, len(pending)))
+    if args.classifier == "classical":
+        # Ekspor array hutan & kompilasi kernel sekali di sini; semua worker me-memory-map file yang sama
+        from utils.classical_classifier import export_forest
+        from utils.forest_arrays import resolve_engine
+        try:
+            export_forest()
+        except OSError as e:
+            print(f"Could not export random forest arrays: {e}")
+        resolve_engine()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    quantize = True if args.quantize else None
+
+    start, finished, failed = time.perf_counter(), 0, 0
+    with open(os.path.join(args.output, PROGRESS_FILE), "a", encoding="utf-8") as progress, \
+         ProcessPoolExecutor(
+             max_workers=workers,
+             mp_context=mp.get_context("spawn"),
+             initializer=_init_worker,
+             initargs=(args.classifier, args.ner_backend, quantize, threads, not args.no_cache, stream_window),
+         ) as pool:
+        futures = {
+            pool.submit(_process_story, story_id, title, text, args.output, outputs): story_id
+            for story_id, title, text in pending
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+                finished += 1
+            except Exception as e:
+                record = {"story_id": futures[future], "status": "failed", "error": repr(e)}
+                failed += 1
+            progress.write(json.dumps(record) + "\n")
+            progress.flush()
+
+            elapsed = time.perf_counter() - start
+            print(f"[{finished + failed}/{len(pending)}] {record['story_id']}: {record['status']} "
+                  f"({finished / elapsed:.2f} cerita/s)")
+
+    elapsed = time.perf_counter() - start
+    print(f"Selesai: {finished} berhasil, {failed} gagal dalam {elapsed:.1f} s "
+          f"({finished / elapsed:.2f} cerita/s, {workers} worker x {threads} thread)")
+
+if __name__ == "__main__":
+    main()
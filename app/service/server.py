@@ -0,0 +1,349 @@
+# service/server.py
+"""
+Layanan HTTP lokal (JSON) untuk pipeline klasifikasi tokoh. Model dimuat sekali
+dan tetap di memori; permintaan yang datang bersamaan digabung menjadi
+micro-batch untuk extract_characters (NER) dan classifier (RF / IndoBERT),
+dengan batas tunggu maksimum agar latensi p99 tetap terkendali.
+
+Endpoint (POST, body & respons JSON):
+  /preprocess          {"text"}                               -> sentences (list token per kalimat)
+  /extract_characters  {"text"} atau {"sentences": [[token]]} -> characters
+  /cluster             {"characters", "story_id"?}            -> clusters, merged
+  /classify            {"rows", "classifier"?, "quantize"?}   -> predictions, final
+  /pipeline            {"text", "classifier"?, "stages"?}     -> final (+ semua tahap bila stages=true)
+GET /health mengembalikan status dan statistik batch. Body yang tidak valid
+(field hilang / salah tipe, opsi tidak dikenal) dijawab 400; error lain 500.
+
+Jalankan dari folder app/:
+    python service/server.py --port 8000 --preload classical
+    curl -s localhost:8000/pipeline -d '{"text": "Pada suatu hari ..."}'
+"""
+
+import os, sys, json, time, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.micro_batch import MicroBatcher
+from utils.artifact_cache import ARTIFACT_CACHE
+from utils.pipeline import (CLASSIFIERS, run_story, stage_configs, lazy_preprocess, stage_cluster,
+                            stage_role_merge, stage_classify, stage_vote, sentences_from_tokens)
+
+# Batas tunggu micro-batch & ukuran batch maksimum (kalimat untuk NER, baris untuk classifier)
+SERVICE_MAX_WAIT_MS       = float(os.environ.get("SERVICE_MAX_WAIT_MS", "10"))
+SERVICE_NER_MAX_SENTENCES = int(os.environ.get("SERVICE_NER_MAX_SENTENCES", "256"))
+SERVICE_CLASSIFY_MAX_ROWS = int(os.environ.get("SERVICE_CLASSIFY_MAX_ROWS", "512"))
+
+BATCH_COLUMN = "_batch_item"
+
+# === BATCH FUNCTIONS ===
+def _split_frame(df, n_items):
+    groups = dict(tuple(df.groupby(BATCH_COLUMN, sort=False))) if not df.empty else {}
+    return [
+        groups[i].drop(columns=BATCH_COLUMN).reset_index(drop=True) if i in groups else pd.DataFrame()
+        for i in range(n_items)
+    ]
+
+def extract_batch(items, ner_backend=None):
+    """`items`: list token per kalimat per permintaan. Satu panggilan NER untuk semuanya."""
+    from utils.predict import extract_characters
+
+    sentences = [tokens for item in items for tokens in item]
+    offsets, start = [], 0
+    for item in items:
+        offsets.append(start)
+        start += len(item)
+
+    df = extract_characters(sentences, backend=ner_backend)
+    if df.empty:
+        return [pd.DataFrame() for _ in items]
+
+    # sentence_id global -> (permintaan, sentence_id lokal)
+    item_ids = pd.Series(range(len(items))).repeat([len(item) for item in items]).to_numpy()
+    df[BATCH_COLUMN] = item_ids[df["sentence_id"].to_numpy()]
+    df["sentence_id"] = df["sentence_id"] - pd.Series(offsets).to_numpy()[df[BATCH_COLUMN].to_numpy()]
+    return _split_frame(df, len(items))
+
+def classify_batch(items, classifier="classical", quantize=False):
+    """`items`: list enriched_df per permintaan. Satu panggilan classifier untuk semua baris."""
+    frames = [df.assign(**{BATCH_COLUMN: i}) for i, df in enumerate(items) if not df.empty]
+    if not frames:
+        return [pd.DataFrame() for _ in items]
+    predictions = stage_classify(pd.concat(frames, ignore_index=True), classifier, quantize)
+    return _split_frame(predictions, len(items))
+
+# === SERVICE ===
+class InferenceService:
+    """Model resident + satu MicroBatcher per model (backend NER / classifier + quantize)."""
+
+    def __init__(self, max_wait_ms=SERVICE_MAX_WAIT_MS, ner_max_sentences=SERVICE_NER_MAX_SENTENCES,
+                 classify_max_rows=SERVICE_CLASSIFY_MAX_ROWS, cache=ARTIFACT_CACHE):
+        self.max_wait_ms = max_wait_ms
+        self.ner_max_sentences = ner_max_sentences
+        self.classify_max_rows = classify_max_rows
+        self.cache = cache
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def _batcher(self, key, fn, max_batch_size):
+        with self._lock:
+            if key not in self._batchers:
+                self._batchers[key] = MicroBatcher(fn, max_batch_size, self.max_wait_ms,
+                                                   size=len, name="-".join(map(str, key)))
+            return self._batchers[key]
+
+    def ner_batcher(self, ner_backend):
+        return self._batcher(("ner", ner_backend),
+                             lambda items: extract_batch(items, ner_backend), self.ner_max_sentences)
+
+    def classify_batcher(self, classifier, quantize):
+        return self._batcher(("classify", classifier, quantize),
+                             lambda items: classify_batch(items, classifier, quantize), self.classify_max_rows)
+
+    def preload(self, classifiers=(), ner_backend=None):
+        """Muat model sebelum permintaan pertama agar latensi awal tidak melonjak."""
+        from utils.predict import load_ner_pipeline, NER_BACKEND
+        load_ner_pipeline(ner_backend or NER_BACKEND)
+        for classifier in classifiers:
+            if classifier == "bert":
+                from utils.bert_classifier import load_fold_models, load_tokenizer
+                load_tokenizer()
+                load_fold_models()
+            else:
+                from utils.classical_classifier import load_artifacts
+                load_artifacts()
+
+    def stats(self):
+        with self._lock:
+            batchers = dict(self._batchers)
+        return {
+            "-".join(map(str, key)): {"batches": b.batches, "items": b.items,
+                                      "avg_items_per_batch": b.items / b.batches if b.batches else 0.0}
+            for key, b in batchers.items()
+        }
+
+    # --- stages ---
+    def preprocess(self, text, tokenizer=None):
+        tokens = lazy_preprocess(text, tokenizer=tokenizer)("tokens")
+        return sentences_from_tokens(tokens)
+
+    def extract_characters(self, sentences, ner_backend=None):
+        from utils.predict import NER_BACKEND
+        return self.ner_batcher(ner_backend or NER_BACKEND)(sentences)
+
+    def cluster(self, character_df, story_id=1):
+        clusters = stage_cluster(character_df, story_id)
+        return clusters, stage_role_merge(clusters, character_df)
+
+    def classify(self, enriched_df, classifier="classical", quantize=None):
+        if classifier not in CLASSIFIERS:
+            raise ValueError(f"Unknown classifier '{classifier}', expected one of {CLASSIFIERS}")
+        if classifier == "bert":
+            from utils.bert_classifier import BERT_QUANTIZE
+            quantize = BERT_QUANTIZE if quantize is None else quantize
+        predictions = self.classify_batcher(classifier, bool(quantize) and classifier == "bert")(enriched_df)
+        final = stage_vote(predictions, enriched_df, classifier) if not predictions.empty else pd.DataFrame()
+        return predictions, final
+
+    def run_story(self, story_text, story_id=1, title="uploaded", classifier="classical",
+                  ner_backend=None, quantize=None, tokenizer=None):
+        """pipeline.run_story dengan NER & classifier lewat micro-batch."""
+        if classifier not in CLASSIFIERS:
+            raise ValueError(f"Unknown classifier '{classifier}', expected one of {CLASSIFIERS}")
+        configs = stage_configs(story_id, title, classifier, ner_backend, quantize, tokenizer)
+        return run_story(
+            story_text, story_id=story_id, title=title, classifier=classifier,
+            ner_backend=ner_backend, quantize=quantize, tokenizer=tokenizer, cache=self.cache,
+            extract=self.ner_batcher(configs["ner"]["ner_backend"]),
+            classify=self.classify_batcher(classifier, configs[f"classify_{classifier}"]["quantize"]),
+        )
+
+# === HTTP ===
+def records(df):
+    """DataFrame -> list dict yang aman untuk JSON (tipe numpy, NaN -> null)."""
+    if df is None or df.empty:
+        return []
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+class BadRequest(Exception):
+    """Body permintaan tidak valid (400). Error lain dari pipeline menjadi 500."""
+
+# Kolom minimum per endpoint (format output /extract_characters dan tahap "enriched")
+CHARACTER_COLUMNS = ("sentence_id", "Normalized")
+ENRICHED_COLUMNS  = ("story_id", "person", "aliases", "sentence_id", "text", "mention_count",
+                     "word_count", "text_prev", "text_next", "bert_context", "is_primary_in_sentence")
+
+def _field(body, key, kind, default=None, required=False):
+    if key not in body or body[key] is None:
+        if required:
+            raise BadRequest(f"Missing field '{key}'")
+        return default
+    if not isinstance(body[key], kind):
+        raise BadRequest(f"Field '{key}' has the wrong type")
+    return body[key]
+
+def _choice(body, key, choices):
+    value = _field(body, key, str)
+    if value is not None and value not in choices:
+        raise BadRequest(f"Unknown {key} '{value}', expected one of {choices}")
+    return value
+
+def _options(body):
+    """Opsi bersama semua endpoint, divalidasi sebelum pipeline dijalankan."""
+    from utils.predict import NER_BACKENDS
+    from utils.preprocessing import TOKENIZERS
+    return {
+        "story_id"   : _field(body, "story_id", (int, str), 1),
+        "title"      : _field(body, "title", str, "uploaded"),
+        "classifier" : _choice(body, "classifier", CLASSIFIERS) or "classical",
+        "ner_backend": _choice(body, "ner_backend", NER_BACKENDS),
+        "tokenizer"  : _choice(body, "tokenizer", TOKENIZERS),
+        "quantize"   : _field(body, "quantize", bool),
+    }
+
+def _rows(body, key, columns):
+    rows = _field(body, key, list, required=True)
+    if not all(isinstance(row, dict) for row in rows):
+        raise BadRequest(f"Field '{key}' must be a list of objects")
+    df = pd.DataFrame(rows)
+    missing = [col for col in columns if col not in df.columns]
+    if rows and missing:
+        raise BadRequest(f"Field '{key}' is missing columns {missing}")
+    return df
+
+def _sentences(service, body, options):
+    if "sentences" in body:
+        sentences = _field(body, "sentences", list)
+        if not all(isinstance(tokens, list) for tokens in sentences):
+            raise BadRequest("Field 'sentences' must be a list of token lists")
+        return [list(map(str, tokens)) for tokens in sentences]
+    text = _field(body, "text", str, required=True)
+    return service.preprocess(text, options["tokenizer"])
+
+def handle_preprocess(service, body):
+    return {"sentences": _sentences(service, body, _options(body))}
+
+def handle_extract(service, body):
+    options = _options(body)
+    characters = service.extract_characters(_sentences(service, body, options), options["ner_backend"])
+    return {"characters": records(characters)}
+
+def handle_cluster(service, body):
+    options = _options(body)
+    character_df = _rows(body, "characters", CHARACTER_COLUMNS)
+    if character_df.empty:
+        return {"clusters": [], "merged": []}
+    if not character_df["Normalized"].map(lambda name: isinstance(name, str)).all():
+        raise BadRequest("Column 'Normalized' must contain strings")
+    clusters, merged = service.cluster(character_df, options["story_id"])
+    return {"clusters": records(clusters), "merged": records(merged)}
+
+def handle_classify(service, body):
+    options = _options(body)
+    enriched_df = _rows(body, "rows", ENRICHED_COLUMNS)
+    if enriched_df.empty:
+        return {"predictions": [], "final": []}
+    predictions, final = service.classify(enriched_df, options["classifier"], options["quantize"])
+    return {"predictions": records(predictions), "final": records(final)}
+
+def handle_pipeline(service, body):
+    options = _options(body)
+    text = _field(body, "text", str, required=True)
+    results = service.run_story(text, **options)
+    if body.get("stages"):
+        return {name: records(df) for name, df in results.items()}
+    return {"final": records(results["final"])}
+
+ROUTES = {
+    "/preprocess"        : handle_preprocess,
+    "/extract_characters": handle_extract,
+    "/cluster"           : handle_cluster,
+    "/classify"          : handle_classify,
+    "/pipeline"          : handle_pipeline,
+}
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, klien bisa memakai ulang koneksi
+    service = None
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "batches": self.service.stats()})
+        else:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if handler is None:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        start = time.perf_counter()
+        try:
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError as e:
+                raise BadRequest(f"Invalid JSON: {e}")
+            if not isinstance(body, dict):
+                raise BadRequest("Request body must be a JSON object")
+            payload = handler(self.service, body)
+        except BadRequest as e:
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send(500, {"error": repr(e)})
+            return
+        payload["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        self._send(200, payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(host="127.0.0.1", port=8000, service=None, verbose=False):
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service or InferenceService()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVICE_MAX_WAIT_MS,
+                        help="batas tunggu micro-batch (0 = tanpa menunggu teman batch)")
+    parser.add_argument("--ner-max-sentences", type=int, default=SERVICE_NER_MAX_SENTENCES)
+    parser.add_argument("--classify-max-rows", type=int, default=SERVICE_CLASSIFY_MAX_ROWS)
+    parser.add_argument("--preload", nargs="*", default=["classical"], choices=CLASSIFIERS,
+                        help="classifier yang dimuat saat start")
+    parser.add_argument("--no-cache", action="store_true", help="jangan gunakan ArtifactCache untuk /pipeline")
+    parser.add_argument("--verbose", action="store_true", help="log setiap permintaan")
+    args = parser.parse_args()
+
+    service = InferenceService(args.max_wait_ms, args.ner_max_sentences, args.classify_max_rows,
+                               cache=None if args.no_cache else ARTIFACT_CACHE)
+    service.preload(args.preload)
+    server = make_server(args.host, args.port, service, args.verbose)
+    print(f"Listening on http://{args.host}:{args.port} (max wait {args.max_wait_ms:g} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 # utils/alias_clustering.py
+import math
+from collections import Counter, defaultdict
+from functools import lru_cache
+
 import textdistance
 
 POINTERS = [
@@ -19,14 +23,36 @@ FALSE_MERGE = set([
     ('raja', 'rajagaluh')
 ])
 
+# Huruf diurutkan dari yang paling sering muncul dalam nama tokoh; dipakai sebagai
+# urutan global token karakter untuk prefix filtering (huruf lain dianggap paling jarang)
+CHAR_FREQUENCY_ORDER = " anieurtkmslgdhpboyjcwfvzqx"
+
+# Jumlah maksimum skor pasangan nama yang disimpan di memo (LRU)
+SIMILARITY_CACHE_SIZE = 100_000
+
+# Hasil membandingkan satu karakter dengan satu anggota cluster
+MATCH, BREAK, CONTINUE = "match", "break", "continue"
+
 def normalize(text):
     return text.lower().strip()
 
+# === SIMILARITY KERNEL ===
+SIMILARITY_METRICS = {
+    'jaccard': textdistance.jaccard,
+    'jaro': textdistance.jaro,
+}
+
+@lru_cache(maxsize=SIMILARITY_CACHE_SIZE)
+def similarity(s1, s2, metric):
+    """Hanya metrik yang diminta, di-memo per pasangan berurutan (s1, s2)."""
+    return SIMILARITY_METRICS[metric](s1, s2)
+
+def similarity_to_many(name, candidates, metric):
+    """Skor `metric` antara satu nama dan banyak kandidat, sebagai dict kandidat -> skor."""
+    return {candidate: similarity(name, candidate, metric) for candidate in dict.fromkeys(candidates)}
+
 def compute_similarity(s1, s2):
-    return {
-        'jaccard': textdistance.jaccard(s1, s2),
-        'jaro': textdistance.jaro(s1, s2),
-    }
+    return {metric: similarity(s1, s2, metric) for metric in SIMILARITY_METRICS}
 
 def is_excluded(name1, name2):
     name1 = normalize(name1)
@@ -36,79 +62,247 @@ def is_excluded(name1, name2):
             return True
     return False
 
+def words_contained(s1, s2):
+    return f" {s1} " in f" {s2} " or f" {s2} " in f" {s1} "
+
+# === BLOCKING INDEX ===
+def char_rarity(ch):
+    rank = CHAR_FREQUENCY_ORDER.find(ch)
+    return len(CHAR_FREQUENCY_ORDER) if rank < 0 else rank
+
+def char_tokens(name):
+    """Multiset karakter sebagai token (huruf, kemunculan ke-k), huruf paling jarang lebih dulu."""
+    seen = Counter()
+    tokens = []
+    for ch in name:
+        seen[ch] += 1
+        tokens.append((ch, seen[ch]))
+    return sorted(tokens, key=lambda t: (-char_rarity(t[0]), -t[1]))
+
+def jaro_upper_bound(common, len1, len2):
+    # Jaro = (m/|s1| + m/|s2| + (m - t)/m) / 3 dengan m <= jumlah karakter yang sama
+    return (common / len1 + common / len2 + 1) / 3
+
+class AliasIndex:
+    """
+    Inverted index nama alias -> posisi cluster, untuk memilih kandidat yang
+    mungkin cocok dengan sebuah karakter tanpa membandingkan semua nama:
+
+    - nama yang berbagi kata (syarat containment " a " in " b "),
+    - nama berakhiran "nya" (aturan "nya" selalu menentukan hasil),
+    - nama yang batas atas Jaro-nya >= threshold, dicari lewat prefix filter
+      pada token karakter lalu diverifikasi dengan jumlah karakter yang sama.
+
+    Nama di luar kandidat dijamin tidak mengubah hasil clustering (CONTINUE),
+    dan nama di luar kandidat Jaro dijamin memiliki Jaro < threshold.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.positions = {}                  # nama -> [posisi cluster]
+        self.word_index = defaultdict(set)   # kata -> {nama}
+        self.token_index = defaultdict(set)  # token karakter (prefix) -> {nama}
+        self.nya_names = set()
+        self.long_names = []                 # nama >= 4 huruf, urut saat ditambahkan
+        self._tokens = {}
+        self._jaro_cache = {}                # karakter -> (jumlah long_names saat dihitung, kandidat)
+
+        # Overlap karakter minimum (relatif terhadap panjang nama) untuk Jaro >= threshold
+        self.min_overlap_ratio = 3 * threshold - 2
+
+    def _prefix_length(self, name):
+        # Dua nama dengan overlap >= min_overlap pasti berbagi token di prefix sepanjang ini
+        min_overlap = max(1, math.ceil(self.min_overlap_ratio * len(name) - 1e-9))
+        return len(name) - min_overlap + 1
+
+    def _char_tokens(self, name):
+        if name not in self._tokens:
+            self._tokens[name] = char_tokens(name)
+        return self._tokens[name]
+
+    def add(self, name, position):
+        if name not in self.positions:
+            self.positions[name] = []
+            for word in name.split():
+                self.word_index[word].add(name)
+            if len(name) >= 4:
+                self.long_names.append(name)
+                if name.endswith("nya"):
+                    self.nya_names.add(name)
+                for token in self._char_tokens(name)[:self._prefix_length(name)]:
+                    self.token_index[token].add(name)
+        if position not in self.positions[name]:
+            self.positions[name].append(position)
+
+    def _may_reach_threshold(self, character, tokens, name):
+        shorter, longer = sorted((len(character), len(name)))
+        if shorter < self.min_overlap_ratio * longer - 1e-9:
+            return False
+        common = len(tokens & frozenset(self._char_tokens(name)))
+        return jaro_upper_bound(common, len(character), len(name)) >= self.threshold - 1e-9
+
+    def jaro_candidates(self, character):
+        if len(character) < 4:
+            return set()
+        if self.min_overlap_ratio <= 0:
+            return set(self.long_names)
+
+        # Index hanya bertambah, jadi kandidat dari evaluasi sebelumnya tetap berlaku;
+        # cukup periksa nama yang ditambahkan sesudahnya
+        tokens = frozenset(self._char_tokens(character))
+        seen, found = self._jaro_cache.get(character, (None, None))
+        if found is not None:
+            found = found | {name for name in self.long_names[seen:]
+                             if self._may_reach_threshold(character, tokens, name)}
+        else:
+            found, checked = set(), set()
+            for token in self._char_tokens(character)[:self._prefix_length(character)]:
+                for name in self.token_index.get(token, ()):
+                    if name in checked:
+                        continue
+                    checked.add(name)
+                    if self._may_reach_threshold(character, tokens, name):
+                        found.add(name)
+        self._jaro_cache[character] = (len(self.long_names), found)
+        return found
+
+    def candidates(self, character, jaro_names=()):
+        if not character:
+            return set(self.positions)  # "" cocok dengan semua nama
+
+        found = set(jaro_names)
+        for word in character.split():
+            found |= self.word_index.get(word, set())
+        if "" in self.positions:
+            found.add("")
+        if len(character) >= 4 and character.endswith("nya"):
+            found |= self.nya_names
+        return found
+
+    def cluster_positions(self, names):
+        return sorted({pos for name in names for pos in self.positions[name]})
+
+def compare_without_pointer(character, name, threshold, jaro_scores):
+    """`jaro_scores` berisi Jaro semua kandidat yang mungkin >= threshold; sisanya dianggap 0."""
+    if len(character) < 4 or len(name) < 4:
+        if character != name:
+            return MATCH if words_contained(character, name) else CONTINUE
+    if character.endswith("nya") and name.endswith("nya"):
+        if similarity(character[:-3], name[:-3], 'jaro') >= threshold:
+            return MATCH
+        return BREAK
+    if words_contained(character, name):
+        return MATCH
+    if (character, name) in FALSE_MERGE or (name, character) in FALSE_MERGE:
+        return CONTINUE
+    if jaro_scores.get(name, 0.0) >= threshold:
+        if character in name or name in character:
+            return CONTINUE
+        return MATCH
+    return CONTINUE
+
 def cluster_without_pointers(characters_list, aliases_clusters, threshold):
+    """
+    Setiap karakter masuk ke cluster pertama yang memiliki nama cocok, atau
+    membuat cluster baru. Hanya cluster yang berisi kandidat dari AliasIndex
+    yang diperiksa.
+
+    Karakter yang sama bisa muncul berkali-kali (satu per mention). Mention
+    ulang hanya dievaluasi lagi bila ada cluster yang berubah sejak evaluasi
+    terakhirnya; bila tidak, hasilnya pasti sama dan tidak mengubah apa pun.
+    """
     cluster_id = len(aliases_clusters) + 1
+    clusters = list(aliases_clusters.values())
+    index = AliasIndex(threshold)
+    for position, cluster in enumerate(clusters):
+        for name in cluster:
+            index.add(normalize(name), position)
+
+    version, settled = 0, {}
     for character in characters_list:
         character = normalize(character)
-        found = False
-        for key, cluster in aliases_clusters.items():
-            for name in cluster:
+        if settled.get(character) == version:
+            continue
+
+        jaro_names = index.jaro_candidates(character)
+        jaro_scores = similarity_to_many(character, jaro_names, 'jaro')
+        candidates = index.candidates(character, jaro_names)
+        target = None
+        for position in index.cluster_positions(candidates):
+            for name in clusters[position]:
                 name = normalize(name)
-                if len(character) < 4 or len(name) < 4:
-                    if character != name:
-                        if f" {character} " in f" {name} " or f" {name} " in f" {character} ":
-                            cluster.add(character)
-                            found = True
-                            break
-                        continue
-                if character.endswith("nya") and name.endswith("nya"):
-                    if compute_similarity(character[:-3], name[:-3])['jaro'] >= threshold:
-                        cluster.add(character)
-                        found = True
-                        break
-                    else:
-                        break
-                if f" {character} " in f" {name} " or f" {name} " in f" {character} ":
-                    cluster.add(character)
-                    found = True
-                    break
-                if (character, name) in FALSE_MERGE or (name, character) in FALSE_MERGE:
+                if name not in candidates:
                     continue
-                if compute_similarity(character, name)['jaro'] >= threshold:
-                    if character in name or name in character:
-                        continue
-                    cluster.add(character)
-                    found = True
+                verdict = compare_without_pointer(character, name, threshold, jaro_scores)
+                if verdict == MATCH:
+                    target = position
+                if verdict != CONTINUE:
                     break
-            if found:
+            if target is not None:
                 break
-        if not found:
+
+        if target is None:
             aliases_clusters[f"person-{cluster_id}"] = {character}
+            clusters.append(aliases_clusters[f"person-{cluster_id}"])
+            index.add(character, len(clusters) - 1)
             cluster_id += 1
+        elif character not in clusters[target]:
+            clusters[target].add(character)
+            index.add(character, target)
+        else:
+            settled[character] = version
+            continue
+        version += 1
     return aliases_clusters
 
+def pointer_suffix(name, pointer):
+    return name[len(pointer):].strip()
+
+def match_pointer_name(character, name, pointer, threshold, jaccard_scores):
+    """`jaccard_scores` berisi Jaccard sufiks karakter terhadap sufiks nama (>= 4 huruf)."""
+    if is_excluded(character, name):
+        return False
+    suffix_char = pointer_suffix(character, pointer)
+    suffix_name = pointer_suffix(name, pointer)
+    if len(suffix_char) < 4 or len(suffix_name) < 4:
+        if suffix_char != suffix_name:
+            return False
+    return suffix_char in suffix_name or jaccard_scores[suffix_name] >= threshold
+
 def cluster_with_pointers(characters_with_pointer, pointers, threshold):
+    characters_with_pointer = [normalize(char) for char in characters_with_pointer]
     all_pointer_item_clusters = []
     for p in pointers:
         pointer_cluster = {}
         pointer_cluster_id = 1
         one_token_list = []
-        character_per_pointer = [char for char in characters_with_pointer if normalize(char).startswith(p)]
+        long_suffixes = []
+        version, settled = 0, {}
+        character_per_pointer = [char for char in characters_with_pointer if char.startswith(p)]
         for character in character_per_pointer:
-            character = normalize(character)
             tokens = character.split()
             if len(tokens) == 1:
                 one_token_list.append(character)
-            else:
-                found = False
+            elif settled.get(character) != version:
+                suffix_char = pointer_suffix(character, p)
+                jaccard_scores = similarity_to_many(suffix_char, long_suffixes, 'jaccard') \
+                    if len(suffix_char) >= 4 else {}
+                target = None
                 for cluster in pointer_cluster.values():
-                    for name in cluster:
-                        if is_excluded(character, name):
-                            continue
-                        suffix_char = character[len(p):].strip()
-                        suffix_name = name[len(p):].strip()
-                        if len(suffix_char) < 4 or len(suffix_name) < 4:
-                            if suffix_char != suffix_name:
-                                continue
-                        if suffix_char in suffix_name or compute_similarity(suffix_char, suffix_name)['jaccard'] >= threshold:
-                            cluster.append(character)
-                            found = True
-                            break
-                    if found:
+                    if any(match_pointer_name(character, name, p, threshold, jaccard_scores) for name in cluster):
+                        target = cluster
                         break
-                if not found:
+                if target is None:
                     pointer_cluster[pointer_cluster_id] = [character]
                     pointer_cluster_id += 1
+                elif character not in target:
+                    target.append(character)
+                else:
+                    settled[character] = version
+                    continue
+                if len(suffix_char) >= 4:
+                    long_suffixes.append(suffix_char)
+                version += 1
         if one_token_list:
             if len(pointer_cluster) == 1:
                 for item in one_token_list:
@@ -131,8 +325,9 @@ def merge_clusters(aliases_clusters, pointer_clusters):
 
 def cluster_character_aliases(characters_list):
     aliases_clusters = {}
-    characters_with_pointer = [c for c in characters_list if any(normalize(c).startswith(p) for p in POINTERS)]
-    characters_without_pointer = [c for c in characters_list if c not in characters_with_pointer]
+    has_pointer = {c: any(normalize(c).startswith(p) for p in POINTERS) for c in set(characters_list)}
+    characters_with_pointer = [c for c in characters_list if has_pointer[c]]
+    characters_without_pointer = [c for c in characters_list if not has_pointer[c]]
     aliases_clusters = cluster_without_pointers(characters_without_pointer, aliases_clusters, 0.82)
     pointer_clusters = cluster_with_pointers(characters_with_pointer, POINTERS, 0.75)
     return merge_clusters(aliases_clusters, pointer_clusters)
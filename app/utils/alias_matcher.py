@@ -0,0 +1,71 @@
+# utils/alias_matcher.py
+
+import re
+from collections import deque
+
+_WORD_CHAR = re.compile(r"\w")
+
+def _is_word(text, i):
+    return 0 <= i < len(text) and _WORD_CHAR.match(text, i) is not None
+
+def is_word_bounded(text, start, end):
+    """True bila text[start:end] cocok dengan pola rf"\\b{alias}\\b" di posisi tersebut."""
+    return (_is_word(text, start - 1) != _is_word(text, start)
+            and _is_word(text, end - 1) != _is_word(text, end))
+
+# Pola rf"\b{alias}\b" dengan alias == "": cocok di setiap batas kata
+_EMPTY_ALIAS = re.compile(r"\b\b")
+
+def count_empty_alias_matches(text):
+    """Jumlah kecocokan rf"\b{alias}\b" untuk alias kosong, yaitu jumlah batas kata di `text`."""
+    # Mempertahankan hasil regex lama (saat training) untuk alias == ""
+    return len(_EMPTY_ALIAS.findall(text))
+
+class AliasMatcher:
+    """
+    Automaton Aho-Corasick untuk seluruh alias dalam satu cerita.
+    Satu kali scan teks menghasilkan semua kemunculan (termasuk yang tumpang
+    tindih) dari semua alias, sebagai pengganti `alias in teks` / regex per alias.
+    """
+
+    def __init__(self, aliases):
+        self.aliases = list(dict.fromkeys(a for a in aliases if a))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out  = [()]
+
+        for alias in self.aliases:
+            node = 0
+            for ch in alias:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (alias,)
+
+        # Failure link dibangun secara BFS; output node mewarisi output failure-nya
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def finditer(self, text):
+        """Yield (start, end, alias) untuk setiap kemunculan, urut berdasarkan posisi akhir."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for alias in out[node]:
+                yield i + 1 - len(alias), i + 1, alias
@@ -0,0 +1,161 @@
+# utils/artifact_cache.py
+
+import os
+import json
+import uuid
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+APP_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(APP_DIR, "models")
+
+# Folder & ukuran maksimum cache (bisa diatur lewat environment variable)
+CACHE_DIR       = os.environ.get("PIPELINE_CACHE_DIR", os.path.join(APP_DIR, ".cache", "artifacts"))
+CACHE_MAX_BYTES = int(float(os.environ.get("PIPELINE_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# Naikkan bila logika salah satu tahap berubah, agar entri lama tidak terpakai lagi
+CACHE_VERSION = 2
+
+# Folder models/ yang memengaruhi output tiap tahap (termasuk tahap sebelumnya)
+STAGE_MODELS = {
+    "preprocess"        : (),
+    "sentences"         : (),
+    "ner"               : ("ner_model",),
+    "cluster"           : ("ner_model",),
+    "role_merge"        : ("ner_model",),
+    "features"          : ("ner_model",),
+    "classify_classical": ("ner_model", "random_forest_normalized"),
+    "classify_bert"     : ("ner_model", "V4_CahyaBERT"),
+    "vote_classical"    : ("ner_model", "random_forest_normalized"),
+    "vote_bert"         : ("ner_model", "V4_CahyaBERT"),
+}
+
+# File turunan yang dibuat otomatis oleh aplikasi, tidak dihitung sebagai versi model
+DERIVED_SUFFIXES = ("_int8.pt",)
+
+# === KEYS ===
+def story_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def model_version(name, models_dir=MODELS_DIR):
+    """Sidik jari folder model dari (path, ukuran, mtime) setiap file di dalamnya."""
+    root = os.path.join(models_dir, name)
+    digest = hashlib.sha1()
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith(DERIVED_SUFFIXES):
+                continue
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            digest.update(f"{os.path.relpath(path, root)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def _restore_lists(df):
+    # Parquet mengembalikan kolom list sebagai np.ndarray; kembalikan ke list Python
+    for col in df.columns[df.dtypes == object]:
+        if df[col].map(lambda v: isinstance(v, np.ndarray)).any():
+            df[col] = df[col].map(lambda v: v.tolist() if isinstance(v, np.ndarray) else v)
+    return df
+
+# === CACHE ===
+class ArtifactCache:
+    """
+    Cache output tiap tahap pipeline di disk (Parquet), dengan key hash dari
+    teks cerita, nama tahap, versi model, dan konfigurasi. Bila ukuran total
+    melebihi `max_bytes`, entri yang paling lama tidak dipakai dihapus (LRU).
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, models_dir=MODELS_DIR):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.models_dir = models_dir
+        self._lock = threading.Lock()
+
+    def key(self, stage, story_text, config=None):
+        payload = {
+            "version": CACHE_VERSION,
+            "stage"  : stage,
+            "story"  : story_hash(story_text),
+            "models" : {name: model_version(name, self.models_dir) for name in STAGE_MODELS.get(stage, ())},
+            "config" : config or {},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)  # tandai baru dipakai (untuk LRU)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        return _restore_lists(df)
+
+    def put(self, key, df):
+        """Simpan `df`; gagal menulis atau evict hanya dilaporkan, tidak pernah raise."""
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Could not cache artifact {key}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        try:
+            self.evict()
+        except OSError as e:
+            print(f"Could not evict artifact cache: {e}")
+
+    def cached(self, stage, story_text, compute, config=None):
+        """Kembalikan (DataFrame, hit): dari cache bila ada, selain itu hitung lalu simpan."""
+        key = self.key(stage, story_text, config)
+        df = self.get(key)
+        if df is not None:
+            return df, True
+        df = compute()
+        self.put(key, df)
+        return df, False
+
+    def evict(self):
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith(".parquet")]
+            except FileNotFoundError:
+                return
+            stats = []
+            for e in entries:
+                # Proses lain (worker run_batch) bisa menghapus entri setelah scandir
+                try:
+                    st = e.stat()
+                except FileNotFoundError:
+                    continue
+                stats.append((st.st_mtime, st.st_size, e.path))
+            total = sum(size for _, size, _ in stats)
+            for _, size, path in sorted(stats):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            if os.path.isdir(self.directory):
+                for entry in os.scandir(self.directory):
+                    if entry.name.endswith(".parquet"):
+                        os.remove(entry.path)
+
+ARTIFACT_CACHE = ArtifactCache()
@@ -4,22 +4,41 @@ import os
 import torch
 import pandas as pd
 from collections import Counter, defaultdict
-from transformers import BertTokenizer, BertModel
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from transformers import BertModel, BertConfig
 from safetensors.torch import load_file
 import torch.nn as nn
 import numpy as np
 import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
+from utils.tokenization import get_fast_tokenizer, encode_segments
 
 LABELS = ["Lainnya", "Protagonis", "Antagonis"]
 FOLDS = 5
+BATCH_SIZE = 16
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+BASE_MODEL = "cahya/bert-base-indonesian-1.5G"
+MODEL_DIR  = os.path.join(os.path.dirname(__file__), "..", "models", "V4_CahyaBERT")
+
+# Mode eksekusi ensemble: "sequential" (satu fold per waktu) atau "parallel" (fold berjalan
+# bersamaan di thread pool, opsional untuk CPU multi-core). Default sequential; ukur dulu
+# dengan benchmarks/bench_bert_ensemble.py sebelum memakai ENSEMBLE_MODE=parallel
+ENSEMBLE_MODES = ("sequential", "parallel")
+ENSEMBLE_MODE  = os.environ.get("ENSEMBLE_MODE", "sequential")
+
+# Inferensi int8 (dynamic quantization) untuk CPU; checkpoint int8 di-cache per fold
+BERT_QUANTIZE  = os.environ.get("BERT_QUANTIZE", "0") == "1"
+QUANTIZED_FILE = "model_int8.pt"
+
 # === MODEL ===
 class IndoBERTWithNumeric(nn.Module):
-    def __init__(self, model_name="cahya/bert-base-indonesian-1.5G", num_labels=3, num_numeric_features=3):
+    def __init__(self, model_name=BASE_MODEL, num_labels=3, num_numeric_features=3, config=None):
         super().__init__()
-        self.bert = BertModel.from_pretrained(model_name)
+        # Dengan `config`, arsitektur dibangun lokal tanpa mengunduh bobot pretrained
+        # (bobot akan ditimpa oleh checkpoint fold)
+        self.bert = BertModel(config) if config is not None else BertModel.from_pretrained(model_name)
         self.dropout = nn.Dropout(0.3)
         self.classifier = nn.Linear(self.bert.config.hidden_size + num_numeric_features, num_labels)
 
@@ -32,8 +51,23 @@ class IndoBERTWithNumeric(nn.Module):
 
 # === DATASET ===
 class SentenceDataset(Dataset):
-    def __init__(self, df, tokenizer, numeric_cols):
-        self.encodings = tokenizer(df["bert_context"].tolist(), truncation=True, padding=True, max_length=128)
+    """
+    Dataset kolumnar: token ID seluruh baris disimpan sekali sebagai satu tensor
+    kontigu (tanpa padding) beserta offset & panjangnya, fitur numerik sebagai
+    satu tensor, dan metadata tetap berupa kolom DataFrame.
+
+    Item hanyalah indeks baris; padding dilakukan per batch di `collate`, dan
+    `length_bucketed_batches` mengelompokkan baris dengan panjang yang mirip.
+    """
+    def __init__(self, df, tokenizer, numeric_cols, max_length=128):
+        # Encoding per kalimat di-cache, jadi konteks yang saling tumpang tindih tidak ditokenisasi ulang
+        ids = encode_segments(tokenizer, df["bert_context"].tolist(), max_length=max_length)
+
+        self.lengths = torch.tensor([len(x) for x in ids], dtype=torch.long)
+        self.offsets = torch.cumsum(self.lengths, dim=0) - self.lengths
+        self.input_ids = torch.tensor([t for x in ids for t in x], dtype=torch.long)
+        self.pad_token_id = tokenizer.pad_token_id or 0
+
         self.numeric_feats = torch.tensor(df[numeric_cols].values, dtype=torch.float)
         self.meta = df[["story_id", "person", "sentence_id"]].reset_index(drop=True)
 
@@ -41,52 +75,180 @@ class SentenceDataset(Dataset):
         return len(self.meta)
 
     def __getitem__(self, idx):
-        item = {key: torch.tensor(val[idx]) for key, val in self.encodings.items()}
-        item["numeric_feats"] = self.numeric_feats[idx]
-        item["meta"] = self.meta.loc[idx].to_dict()
-        return item
-
-def custom_collate_fn(batch):
-    keys = batch[0].keys()
-    collated = {k: [d[k] for d in batch] for k in keys}
-    for k in ["input_ids", "attention_mask", "numeric_feats"]:
-        collated[k] = torch.stack(collated[k])
-    return collated
+        return idx
+
+    def length_bucketed_batches(self, batch_size):
+        order = torch.argsort(self.lengths, stable=True).tolist()
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+    def collate(self, indices):
+        index = torch.as_tensor(indices, dtype=torch.long)
+        lengths = self.lengths[index]
+        positions = torch.arange(int(lengths.max()))
+
+        # Padding dinamis: hanya sepanjang baris terpanjang di batch ini
+        attention_mask = (positions < lengths[:, None]).long()
+        flat = (self.offsets[index][:, None] + positions).clamp(max=max(len(self.input_ids) - 1, 0))
+        input_ids = torch.where(attention_mask.bool(), self.input_ids[flat], self.pad_token_id)
+
+        return {
+            "index": index,
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "numeric_feats": self.numeric_feats[index],
+        }
+
+# === MODEL REGISTRY ===
+def _save_local(obj):
+    # Simpan salinan lokal agar pemanggilan berikutnya tidak butuh akses hub
+    try:
+        obj.save_pretrained(MODEL_DIR)
+    except OSError as e:
+        print(f"Could not cache {type(obj).__name__} in {MODEL_DIR}: {e}")
+
+def load_bert_config():
+    local_config = os.path.join(MODEL_DIR, "config.json")
+    if os.path.exists(local_config):
+        return BertConfig.from_json_file(local_config)
+    config = BertConfig.from_pretrained(BASE_MODEL)
+    _save_local(config)
+    return config
+
+def load_tokenizer():
+    if os.path.exists(os.path.join(MODEL_DIR, "vocab.txt")):
+        return get_fast_tokenizer(MODEL_DIR)
+    tokenizer = get_fast_tokenizer(BASE_MODEL)
+    _save_local(tokenizer)
+    return tokenizer
+
+def _quantize(model):
+    # Dynamic int8: bobot nn.Linear dikuantisasi, aktivasi dikuantisasi saat runtime (CPU)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def _load_checkpoint(model, model_path):
+    """
+    Muat bobot fold ke model yang dibangun dari config (bobot acak). Semua key
+    harus ada: key yang hilang akan tetap acak dan prediksinya tidak bermakna.
+    """
+    result = model.load_state_dict(load_file(model_path), strict=False)
+    # position_ids adalah buffer non-persistent di transformers baru, tapi ikut
+    # tersimpan di checkpoint yang dilatih dengan versi lama
+    unexpected = [k for k in result.unexpected_keys if not k.endswith("embeddings.position_ids")]
+    if result.missing_keys or unexpected:
+        raise RuntimeError(
+            f"Checkpoint {model_path} does not match the model: "
+            f"missing keys {result.missing_keys}, unexpected keys {unexpected}"
+        )
+
+def _load_fold(config, fold_dir, quantize=False):
+    model_path = os.path.join(fold_dir, "model.safetensors")
+    model = IndoBERTWithNumeric(config=config)
+    model.eval()
+
+    if not quantize:
+        _load_checkpoint(model, model_path)
+        return model.to(DEVICE)
+
+    # Checkpoint int8 di-cache di samping checkpoint aslinya dan dibuat ulang
+    # bila model.safetensors lebih baru
+    quantized_path = os.path.join(fold_dir, QUANTIZED_FILE)
+    if os.path.exists(quantized_path) and os.path.getmtime(quantized_path) >= os.path.getmtime(model_path):
+        model = _quantize(model)
+        model.load_state_dict(torch.load(quantized_path, weights_only=False))
+        return model
+
+    _load_checkpoint(model, model_path)
+    model = _quantize(model)
+    try:
+        torch.save(model.state_dict(), quantized_path)
+    except OSError as e:
+        print(f"Could not cache quantized fold in {quantized_path}: {e}")
+    return model
+
+def model_device(quantize=False):
+    # Model hasil dynamic quantization hanya bisa dijalankan di CPU
+    return torch.device("cpu") if quantize else DEVICE
+
+def load_fold_models(*, quantize=None):
+    """
+    Muat kelima checkpoint fold sekali per proses dan simpan di memori.
+    Arsitektur dibangun dari config lokal, jadi tidak ada unduhan dari hub.
+    Dengan `quantize=True`, layer Linear dikuantisasi ke int8 untuk inferensi CPU;
+    `None` berarti BERT_QUANTIZE.
+    """
+    # Normalisasi di sini agar setiap pemanggil memakai key lru_cache yang sama
+    return _load_fold_models(BERT_QUANTIZE if quantize is None else bool(quantize))
+
+@lru_cache(maxsize=None)
+def _load_fold_models(quantize):
+    config = load_bert_config()
+    return tuple(
+        _load_fold(config, os.path.join(MODEL_DIR, f"best_fold_{fold_idx + 1}"), quantize)
+        for fold_idx in range(FOLDS)
+    )
+
+# === ENSEMBLE EXECUTION ===
+def _fold_executor_threads():
+    # Bagi core CPU rata ke setiap fold agar thread intra-op tidak saling berebut
+    return max(1, (os.cpu_count() or 1) // FOLDS)
+
+@lru_cache(maxsize=None)
+def _fold_executor():
+    # torch.set_num_threads berlaku per thread worker (OpenMP), jadi cukup di initializer
+    return ThreadPoolExecutor(
+        max_workers=FOLDS,
+        initializer=torch.set_num_threads,
+        initargs=(_fold_executor_threads(),),
+    )
+
+def _fold_probs(model, input_ids, attention_mask, numeric_feats):
+    # no_grad bersifat thread-local, jadi harus diaktifkan di dalam worker
+    with torch.no_grad():
+        logits = model(input_ids, attention_mask, numeric_feats)
+        return F.softmax(logits, dim=1).cpu()
 
 # === MAIN FUNCTION ===
-def classify_characters(enriched_df: pd.DataFrame) -> pd.DataFrame:
-    tokenizer = BertTokenizer.from_pretrained("cahya/bert-base-indonesian-1.5G")
+def classify_characters(enriched_df: pd.DataFrame, ensemble_mode=None, quantize=None) -> pd.DataFrame:
+    ensemble_mode = ensemble_mode or ENSEMBLE_MODE
+    quantize = BERT_QUANTIZE if quantize is None else quantize
+    if ensemble_mode not in ENSEMBLE_MODES:
+        raise ValueError(f"Unknown ensemble mode '{ensemble_mode}', expected one of {ENSEMBLE_MODES}")
+
+    tokenizer = load_tokenizer()
     numeric_cols = ["mention_count", "word_count", "is_primary_in_sentence"]
     dataset = SentenceDataset(enriched_df, tokenizer, numeric_cols)
-    dataloader = DataLoader(dataset, batch_size=16, collate_fn=custom_collate_fn)
+    dataloader = DataLoader(
+        dataset,
+        batch_sampler=dataset.length_bucketed_batches(BATCH_SIZE),
+        collate_fn=dataset.collate,
+    )
+    models = load_fold_models(quantize=quantize)
+    device = model_device(quantize)
 
     predictions_per_sentence = [[] for _ in range(len(enriched_df))]
+    probs_per_sentence = [[] for _ in range(len(enriched_df))]
 
-    for fold_idx in range(FOLDS):
-        model_path = os.path.join(os.path.dirname(__file__), "..", "models", "V4_CahyaBERT", f"best_fold_{fold_idx + 1}", "model.safetensors")
-        model = IndoBERTWithNumeric()
-        model.load_state_dict(load_file(model_path), strict=False)
-        model.to(DEVICE)
-        model.eval()
-
-        probs_per_sentence = [[] for _ in range(len(enriched_df))]
-
-        with torch.no_grad():
-            idx = 0
-            for batch in dataloader:
-                input_ids = batch["input_ids"].to(DEVICE)
-                attention_mask = batch["attention_mask"].to(DEVICE)
-                numeric_feats = batch["numeric_feats"].to(DEVICE)
+    for batch in dataloader:
+        # Setiap batch di-collate dan dipindah ke device sekali untuk semua fold
+        inputs = (
+            batch["input_ids"].to(device),
+            batch["attention_mask"].to(device),
+            batch["numeric_feats"].to(device),
+        )
 
-                logits = model(input_ids, attention_mask, numeric_feats)
-                probs = F.softmax(logits, dim=1).cpu()
-                preds = torch.argmax(probs, dim=1).tolist()
+        if ensemble_mode == "parallel":
+            fold_probs = list(_fold_executor().map(lambda m: _fold_probs(m, *inputs), models))
+        else:
+            fold_probs = [_fold_probs(m, *inputs) for m in models]
 
-                for p, prob in zip(preds, probs):
-                    predictions_per_sentence[idx].append(p)
-                    probs_per_sentence[idx].append(prob.numpy())  # Save actual softmax probs
-                    idx += 1
+        probs = torch.stack(fold_probs)          # (FOLDS, batch, labels)
+        preds = torch.argmax(probs, dim=2)       # (FOLDS, batch)
 
+        # Batch dikelompokkan per panjang, jadi hasil dikembalikan ke baris aslinya via index
+        for b, row in enumerate(batch["index"].tolist()):
+            predictions_per_sentence[row] = preds[:, b].tolist()
+            # Sama seperti sebelumnya: confidence memakai softmax fold terakhir
+            probs_per_sentence[row] = [probs[-1, b].numpy()]
 
     final_preds = [Counter(votes).most_common(1)[0][0] for votes in predictions_per_sentence]
     enriched_df["predicted_type"] = [LABELS[i] for i in final_preds]
@@ -1,17 +1,66 @@
 import os
+from functools import lru_cache
+
 import pandas as pd
-from scipy.sparse import hstack
 import joblib
 
-# === LOAD MODEL ARTEFACTS ===
-ROOT_DIR   = "models/random_forest_normalized"
+from utils.forest_arrays import ForestArrays, SklearnForest, export_forest_arrays, is_exported
+
+# === MODEL ARTEFACTS ===
+# Path relatif terhadap paket (bukan CWD), jadi modul bisa dipakai dari folder mana pun
+APP_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR   = os.path.join(APP_DIR, "models", "random_forest_normalized")
 BEST_MODEL = os.path.join(ROOT_DIR, "best_model.pkl")
 TFIDF_VEC  = os.path.join(ROOT_DIR, "tfidf.pkl")
 LBL_ENCOD  = os.path.join(ROOT_DIR, "label_encoder.pkl")
 
-rf    = joblib.load(BEST_MODEL)
-tfidf = joblib.load(TFIDF_VEC)
-le    = joblib.load(LBL_ENCOD)
+# Array node hutan untuk memory-map, diekspor otomatis dari best_model.pkl ke
+# folder cache yang bisa ditulis (folder models/ boleh read-only)
+FOREST_CACHE_DIR = os.environ.get("RF_ARRAYS_DIR", os.path.join(APP_DIR, ".cache", "forest_arrays"))
+
+def forest_arrays_dir():
+    """
+    Folder ekspor untuk best_model.pkl saat ini. Namanya memuat ukuran & mtime
+    model, jadi model baru diekspor ke folder baru dan folder lama yang mungkin
+    sedang dibaca proses lain tidak pernah dihapus di tempat.
+    """
+    stat = os.stat(BEST_MODEL)
+    return os.path.join(FOREST_CACHE_DIR, f"random_forest_normalized-{stat.st_size}-{stat.st_mtime_ns}")
+
+def export_forest(overwrite=False):
+    """
+    Ekspor best_model.pkl ke FOREST_CACHE_DIR bila belum ada. Panggil sekali di
+    proses induk sebelum membuat worker.
+    """
+    out_dir = forest_arrays_dir()
+    if overwrite or not is_exported(out_dir, source=BEST_MODEL):
+        os.makedirs(FOREST_CACHE_DIR, exist_ok=True)
+        export_forest_arrays(joblib.load(BEST_MODEL), out_dir, overwrite=overwrite)
+    return out_dir
+
+@lru_cache(maxsize=None)
+def load_forest():
+    """
+    Hutan memory-mapped: semua proses berbagi satu salinan fisik array node.
+    Bila ekspor / mmap gagal (mis. cache tidak bisa ditulis), pakai hutan sklearn.
+    """
+    try:
+        return ForestArrays(export_forest())
+    except (OSError, ValueError) as e:
+        print(f"Could not memory-map random forest, falling back to sklearn: {e}")
+        return SklearnForest(joblib.load(BEST_MODEL))
+
+@lru_cache(maxsize=None)
+def load_tfidf():
+    return joblib.load(TFIDF_VEC)
+
+@lru_cache(maxsize=None)
+def load_label_encoder():
+    return joblib.load(LBL_ENCOD)
+
+def load_artifacts():
+    """Muat (forest, tfidf, label encoder) sekali per proses, saat pertama dipakai."""
+    return load_forest(), load_tfidf(), load_label_encoder()
 
 # Map ke label Bahasa Indonesia
 label_map = {
@@ -22,6 +71,7 @@ label_map = {
 
 # === CLASSIFIER FUNCTION ===
 def classify_characters(df: pd.DataFrame) -> pd.DataFrame:
+    rf, tfidf, le = load_artifacts()
     df = df.copy()
 
     # Fill missing text column (for TF-IDF)
@@ -32,14 +82,12 @@ def classify_characters(df: pd.DataFrame) -> pd.DataFrame:
     for col in num_cols:
         df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
 
-    # Gabungkan fitur numerik dan teks
+    # Fitur numerik + teks sebagai blok kolom (tanpa hstack), urutan sama seperti saat training
     X_num = df[num_cols].values
     X_text = tfidf.transform(df["text"])
-    X = hstack([X_num, X_text])
 
-    # Prediksi
-    y_pred = rf.predict(X)
-    probs  = rf.predict_proba(X)
+    # Prediksi: label & probabilitas dalam satu traversal hutan
+    y_pred, probs = rf.predict_with_proba([X_num, X_text])
 
     # Inverse transform ke label asli, lalu map ke Bahasa Indonesia
     df["predicted_type"] = le.inverse_transform(y_pred)
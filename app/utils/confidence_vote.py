@@ -2,7 +2,6 @@
 
 import pandas as pd
 import numpy as np
-from collections import defaultdict
 
 # Ganti LABELS ke Bahasa Indonesia
 LABELS = ["Lainnya", "Protagonis", "Antagonis"]
@@ -23,39 +22,33 @@ def confidence_weighted_vote(pred_df: pd.DataFrame) -> pd.DataFrame:
             - aliases  (bila tersedia di pred_df)
     """
 
-    # Mapping label ke indeks
-    label_to_index = {label: i for i, label in enumerate(LABELS)}
-    confidence_dict = defaultdict(lambda: np.zeros(len(LABELS)))
-
     # Jika kolom person berisi list, ubah dulu ke string agar bisa dipakai sebagai key
-    if pred_df["person"].apply(lambda x: isinstance(x, list)).any():
+    # (infer_dtype memeriksa kolom di C; kolom berisi string saja pasti tanpa list)
+    if pd.api.types.infer_dtype(pred_df["person"], skipna=False) != "string" and \
+            pred_df["person"].apply(lambda x: isinstance(x, list)).any():
         pred_df["person"] = pred_df["person"].apply(
             lambda x: ", ".join(map(str, x)) if isinstance(x, list) else str(x)
         )
 
-    # Pastikan kolom confidence sudah ada; jika belum, default 0
-    for row in pred_df.itertuples():
-        key = (row.story_id, row.person)
-        conf = np.array([
-            getattr(row, "conf_Lainnya", 0),
-            getattr(row, "conf_Protagonis", 0),
-            getattr(row, "conf_Antagonis", 0),
-        ])
-        confidence_dict[key] += conf
+    # Satu kode grup per (story_id, person), urut sesuai kemunculan pertama
+    codes = pred_df.groupby(["story_id", "person"], sort=False, dropna=False).ngroup().to_numpy()
+    n_groups = codes.max() + 1 if len(codes) else 0
+    _, first_rows = np.unique(codes, return_index=True)
 
-    results = []
-    for (story_id, person), conf_vec in confidence_dict.items():
-        label_idx = np.argmax(conf_vec)
-        results.append({
-            "story_id": story_id,
-            "person": person,
-            "predicted_type": LABELS[label_idx],
-            "confidence_Lainnya": conf_vec[0],
-            "confidence_Protagonis": conf_vec[1],
-            "confidence_Antagonis": conf_vec[2],
-        })
+    # Jumlahkan confidence per grup (kolom yang tidak ada dianggap 0), lalu argmax sekaligus
+    conf_totals = np.column_stack([
+        np.bincount(codes, weights=pred_df[f"conf_{label}"].to_numpy(dtype=float), minlength=n_groups)
+        if f"conf_{label}" in pred_df.columns else np.zeros(n_groups)
+        for label in LABELS
+    ])
+    label_idx = conf_totals.argmax(axis=1)
 
-    final_df = pd.DataFrame(results)
+    final_df = pd.DataFrame({
+        "story_id": pred_df["story_id"].to_numpy()[first_rows].tolist(),
+        "person": pred_df["person"].to_numpy()[first_rows].tolist(),
+        "predicted_type": np.asarray(LABELS, dtype=object)[label_idx],
+        **{f"confidence_{label}": conf_totals[:, i] for i, label in enumerate(LABELS)},
+    })
 
     # Jika kolom "aliases" ada di pred_df, merge ke final_df
     if "aliases" in pred_df.columns:
@@ -64,9 +57,10 @@ def confidence_weighted_vote(pred_df: pd.DataFrame) -> pd.DataFrame:
         alias_map["aliases"] = alias_map["aliases"].apply(
             lambda x: ", ".join(map(str, x)) if isinstance(x, list) else str(x)
         )
+        alias_map = alias_map.drop_duplicates(["story_id", "person", "aliases"])
 
         final_df["person"] = final_df["person"].astype(str)
-        final_df = final_df.merge(alias_map.drop_duplicates(), on=["story_id", "person"], how="left")
+        final_df = final_df.merge(alias_map, on=["story_id", "person"], how="left")
 
     # Urutkan kolom sesuai format yang diinginkan
     column_order = [
@@ -1,10 +1,20 @@
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
-import re
-from collections import defaultdict
+from collections import defaultdict, Counter
+
+from utils.alias_matcher import AliasMatcher, is_word_bounded, count_empty_alias_matches
+
+def sentence_table(token_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuild the per-sentence table (story_id, sentence_id, text, n_words) from
+    tokens, for token tables that come without the one from preprocess_folktale.
+    """
+    grouped = token_df.groupby(["story_id", "sentence_id"], observed=True, sort=False)["word"]
+    return pd.DataFrame({"text": grouped.agg(" ".join), "n_words": grouped.size()}).reset_index()
 
 def add_features_for_classification(cluster_df: pd.DataFrame,
-                                    token_df: pd.DataFrame) -> pd.DataFrame:
+                                    token_df: pd.DataFrame,
+                                    sentence_df: pd.DataFrame = None) -> pd.DataFrame:
     """
     Build the sentence-level feature table exactly the way it was done in training.
 
@@ -13,12 +23,20 @@ def add_features_for_classification(cluster_df: pd.DataFrame,
         • person
         • aliases   (list[str])
         • sentence_ids (list[int])   ← added in app.py
+
+    `sentence_df` is the sentence table from preprocess_folktale; when omitted
+    it is rebuilt from `token_df`.
     """
 
     # ------------  clean token table  -----------------
     token_df = token_df.dropna(subset=["word"]).copy()
     token_df["word"] = token_df["word"].astype(str)
 
+    # sentences without any token never show up in the token table
+    if sentence_df is None:
+        sentence_df = sentence_table(token_df)
+    sentence_df = sentence_df[sentence_df["n_words"] > 0]
+
     # ------------  helper dicts (per-story) -----------
     story_tokens  = defaultdict(list)
     for r in token_df.itertuples(index=False):
@@ -26,26 +44,50 @@ def add_features_for_classification(cluster_df: pd.DataFrame,
 
     story_strings = {sid: " ".join(tok) for sid, tok in story_tokens.items()}
 
+    # ------------  one alias automaton per story ------
+    story_aliases = defaultdict(set)
+    for row in cluster_df.itertuples():
+        for a in row.aliases:
+            story_aliases[row.story_id].update((a.lower(), a.lower().strip()))
+    matchers = {sid: AliasMatcher(aliases) for sid, aliases in story_aliases.items()}
+
     # ------------  mention_count (training logic) -----
+    # single-token alias : number of identical tokens
+    # multi-token alias  : non-overlapping \balias\b matches (same as re.findall)
+    story_counts = {}
+    def count_story(sid):
+        if sid not in story_counts:
+            txt = story_strings.get(sid, "")
+            multi_counts, last_end = Counter(), {}
+            for start, end, al in matchers[sid].finditer(txt):
+                if (len(al.split()) > 1 and start >= last_end.get(al, 0)
+                        and is_word_bounded(txt, start, end)):
+                    multi_counts[al] += 1
+                    last_end[al] = end
+            story_counts[sid] = (Counter(story_tokens.get(sid, [])), multi_counts)
+        return story_counts[sid]
+
     mention_dict = {}
     for (sid, person), sub in cluster_df.groupby(["story_id", "person"]):
         alias_set = {a.lower().strip()
                      for aliases in sub["aliases"] for a in aliases}
 
-        toks = story_tokens[sid]
+        token_counts, multi_counts = count_story(sid)
         txt = story_strings.get(sid, "")
 
         cnt = 0
         for al in alias_set:
             if len(al.split()) == 1:
-                cnt += toks.count(al)
+                cnt += token_counts[al]
+            elif al:
+                cnt += multi_counts[al]
             else:
-                cnt += len(re.findall(rf"\b{re.escape(al)}\b", txt))
+                cnt += count_empty_alias_matches(txt)
         mention_dict[(sid, person)] = cnt
 
     # ------------  total word_count per Tokoh ---------
     # sentence length lookup
-    sent_len = token_df.groupby("sentence_id")["word"].apply(len).to_dict()
+    sent_len = sentence_df.groupby("sentence_id")["n_words"].sum().to_dict()
 
     # sum sentence lengths for each Tokoh
     word_count_dict = {
@@ -53,50 +95,66 @@ def add_features_for_classification(cluster_df: pd.DataFrame,
         for row in cluster_df.itertuples()
     }
 
-    # ------------  build sentence-level rows ----------
-    all_aliases   = cluster_df["aliases"].explode().dropna().map(str.lower).map(str.strip).unique()
-    alias_pat_map = {a: re.compile(rf"\b{re.escape(a)}\b") for a in all_aliases}
+    # ------------  scan each story's sentences once ---
+    story_sentences = {
+        sid: sdf.set_index("sentence_id")["text"].sort_index().str.lower()
+        for sid, sdf in sentence_df.groupby("story_id", observed=True)
+    }
 
+    story_hits = {}
+    def scan_story(sid):
+        # alias -> {sentence_id} (substring) and sentence_id -> {alias matched as \balias\b}
+        if sid not in story_hits:
+            sentences = story_sentences.get(sid, pd.Series(dtype=object))
+            substring_hits, bounded_hits = defaultdict(set), defaultdict(set)
+            for sent_id, sent_txt in sentences.items():
+                for start, end, al in matchers[sid].finditer(sent_txt):
+                    substring_hits[al].add(sent_id)
+                    if is_word_bounded(sent_txt, start, end):
+                        bounded_hits[sent_id].add(al)
+            story_hits[sid] = (sentences, substring_hits, bounded_hits)
+        return story_hits[sid]
+
+    # ------------  build sentence-level rows ----------
     rows = []
     for row in cluster_df.itertuples():
         sid, pid = row.story_id, row.person
         aliases  = [a.lower() for a in row.aliases]
 
         # only look inside sentences of THIS story
-        story_sent_df = token_df[token_df["story_id"] == sid]
-
-        for sent_id, sent_group in story_sent_df.groupby("sentence_id"):
-            sent_txt = " ".join(sent_group.word).lower()
-            if any(al in sent_txt for al in aliases):
-                # -------- is_primary logic ----------
-                first_alias, first_pos = None, None
-                for al in aliases:
-                    m = alias_pat_map[al].search(sent_txt)
-                    if m and (first_pos is None or m.start() < first_pos):
-                        first_alias, first_pos = al, m.start()
-                is_primary = 1 if first_alias in aliases else 0
-
-                # ---------- append row --------------
-                rows.append({
-                    "story_id"   : sid,
-                    "person"     : pid,
-                    "aliases"    : row.aliases,
-                    "sentence_id": sent_id,
-                    "text"       : sent_txt,
-                    "mention_count": mention_dict[(sid, pid)],
-                    "word_count"   : word_count_dict[(sid, pid)],
-                    "is_primary_in_sentence": is_primary
-                })
+        sentences, substring_hits, bounded_hits = scan_story(sid)
+        if "" in aliases:
+            sent_ids = sentences.index
+        else:
+            sent_ids = sorted(set().union(*(substring_hits.get(al, ()) for al in aliases)))
+
+        for sent_id in sent_ids:
+            sent_txt = sentences[sent_id]
+
+            # -------- is_primary logic ----------
+            # 1 if any alias of this Tokoh appears as a whole word in the sentence
+            hits = bounded_hits.get(sent_id, ())
+            is_primary = 1 if any(al in hits for al in aliases) else 0
+            if not is_primary and "" in aliases and count_empty_alias_matches(sent_txt):
+                is_primary = 1
+
+            # ---------- append row --------------
+            rows.append({
+                "story_id"   : sid,
+                "person"     : pid,
+                "aliases"    : row.aliases,
+                "sentence_id": sent_id,
+                "text"       : sent_txt,
+                "mention_count": mention_dict[(sid, pid)],
+                "word_count"   : word_count_dict[(sid, pid)],
+                "is_primary_in_sentence": is_primary
+            })
 
     df = pd.DataFrame(rows)
 
     # ------------  add context & scale ---------------
     if not df.empty:
-        sent_text_lookup = (
-            token_df.groupby("sentence_id")["word"]
-                    .apply(lambda x: " ".join(x))
-                    .to_dict()
-        )
+        sent_text_lookup = sentence_df.groupby("sentence_id")["text"].agg(" ".join).to_dict()
         df["text_prev"] = df["sentence_id"].apply(lambda x: sent_text_lookup.get(x - 1, ""))
         df["text_next"] = df["sentence_id"].apply(lambda x: sent_text_lookup.get(x + 1, ""))
         df["bert_context"] = (
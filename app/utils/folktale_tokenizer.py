@@ -0,0 +1,151 @@
+# utils/folktale_tokenizer.py
+"""
+Tokenizer kalimat & kata berbasis regex untuk teks cerita rakyat, tanpa
+download data apa pun. Format token mengikuti nltk.word_tokenize (tanda kutip
+pembuka "``" dan penutup "''", titik akhir kalimat dipisah, angka seperti
+1.000 / 10.30 utuh) agar bisa dipakai bergantian di preprocess_folktale.
+
+Perbedaan yang disengaja dengan Punkt:
+  - gelar/sapaan (Dr., Ny., H., ...) dan inisial tidak pernah mengakhiri kalimat,
+  - tanda akhir kalimat yang diikuti huruf kecil (mis. `"Pergi!" kata ibunya`)
+    tidak memutus kalimat.
+"""
+
+import re
+
+# Gelar / sapaan: selalu diikuti nama, tidak pernah mengakhiri kalimat
+HONORIFICS = {
+    "dr", "drs", "dra", "ir", "prof", "h", "hj", "kh", "ny", "nn", "tn", "sdr", "sdri",
+    "bpk", "bp", "yth", "st", "mr", "mrs", "jl", "no",
+}
+
+# Singkatan yang bisa berada di akhir kalimat
+ABBREVIATIONS = {"dll", "dsb", "dst", "dkk", "tsb", "dgn", "sbb", "spt", "tgl", "thn", "kg", "km", "cm"}
+
+TOKEN_PATTERN = re.compile(r"""
+      \.{2,} | …+                     # elipsis
+    | (?:[^\W\d_]\.){2,}              # singkatan bertitik: K.H.  S.H.
+    | \d+(?:[.,:]\d+)+                # angka: 1.000  10.30  3,5
+    | \w+(?:['\-\xad]\w+)*            # kata, termasuk anak-anak dan Jum'at
+    | -{2,}
+    | \S                              # tanda baca lain, satu per token
+""", re.VERBOSE)
+
+TERMINALS   = {".", "!", "?"}
+QUOTES      = {'"', "'"}
+BRACKETS    = {")", "]", "}"}
+OPENERS     = "([{<"
+
+# === TOKENS ===
+def is_abbreviation(word):
+    word = word.lower()
+    return word in HONORIFICS or word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+def iter_raw_tokens(text):
+    """(token, start, end) satu per satu. Titik setelah singkatan/inisial digabung ke tokennya."""
+    previous = None
+    for m in TOKEN_PATTERN.finditer(text):
+        token, start, end = m.group(), m.start(), m.end()
+        if token == "." and previous and previous[2] == start and is_abbreviation(previous[0]):
+            previous = (previous[0] + ".", previous[1], end)
+            continue
+        if previous:
+            yield previous
+        previous = (token, start, end)
+    if previous:
+        yield previous
+
+def raw_tokens(text):
+    return list(iter_raw_tokens(text))
+
+def _is_terminal(token):
+    if token in TERMINALS or token.startswith(("…", "..")):
+        return True
+    # "dll." dsb. boleh mengakhiri kalimat; gelar dan inisial tidak
+    return token.endswith(".") and token[:-1].lower() in ABBREVIATIONS
+
+class _Lookahead:
+    """Buffer token kalimat berjalan + beberapa token lookahead dari generator."""
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self.buffer = []
+
+    def has(self, j):
+        while len(self.buffer) <= j:
+            token = next(self._tokens, None)
+            if token is None:
+                return False
+            self.buffer.append(token)
+        return True
+
+    def glued(self, j):
+        return self.has(j) and self.buffer[j][1] == self.buffer[j - 1][2]
+
+    def opens_quote(self, j):
+        # Kutip yang langsung menempel ke kata sesudahnya adalah kutip pembuka: `kali."Mambang`
+        return self.buffer[j][0] in QUOTES and self.glued(j + 1) and self.buffer[j + 1][0][0].isalnum()
+
+# === SENTENCES ===
+def iter_sentence_tokens(tokens):
+    """
+    State machine di atas token: setelah tanda akhir kalimat (plus kutip/kurung
+    penutup yang menempel), kalimat berakhir bila ada spasi (atau kutip pembuka)
+    dan token berikutnya tidak diawali huruf kecil. Menghasilkan list token per
+    kalimat; hanya kalimat berjalan yang disimpan.
+    """
+    stream = _Lookahead(iter(tokens))
+    buffer, i = stream.buffer, 0
+    while stream.has(i):
+        if not _is_terminal(buffer[i][0]):
+            i += 1
+            continue
+        j = i + 1
+        while stream.has(j) and (buffer[j][0] in BRACKETS or
+                                 (buffer[j][0] in QUOTES and stream.glued(j) and not stream.opens_quote(j))):
+            j += 1
+        if not stream.has(j):
+            break
+        if (not stream.glued(j) or stream.opens_quote(j)) and not buffer[j][0][0].islower():
+            yield buffer[:j]
+            del buffer[:j]
+            i = 0
+        else:
+            i = j
+    if buffer:
+        yield list(buffer)
+
+def _words(text, tokens):
+    words = []
+    for k, (token, start, _) in enumerate(tokens):
+        if token == '"':
+            # Seperti NLTK: kutip di awal kalimat / setelah spasi atau kurung buka = pembuka
+            opening = k == 0 or text[start - 1].isspace() or text[start - 1] in OPENERS
+            token = "``" if opening else "''"
+        words.append(token)
+
+    # Titik di akhir kalimat dipisah (juga setelah singkatan), sebelum kutip/kurung penutup
+    last = len(words) - 1
+    while last >= 0 and words[last] in ("''", "'") + tuple(BRACKETS):
+        last -= 1
+    if last >= 0 and len(words[last]) > 1 and words[last].endswith(".") and not words[last].startswith(".."):
+        words[last:last + 1] = [words[last][:-1], "."]
+    return words
+
+def iter_tokenize(text):
+    """Generator (kalimat, list kata) untuk seluruh teks, dalam satu kali scan."""
+    for sentence_tokens in iter_sentence_tokens(iter_raw_tokens(text)):
+        offset = sentence_tokens[0][1]
+        sentence = text[offset:sentence_tokens[-1][2]]
+        shifted = [(token, s - offset, e - offset) for token, s, e in sentence_tokens]
+        yield sentence, _words(sentence, shifted)
+
+def tokenize(text):
+    """List (kalimat, list kata) untuk seluruh teks."""
+    return list(iter_tokenize(text))
+
+def sent_tokenize(text):
+    return [sentence for sentence, _ in iter_tokenize(text)]
+
+def word_tokenize(sentence):
+    return _words(sentence, raw_tokens(sentence))
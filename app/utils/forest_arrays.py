@@ -0,0 +1,290 @@
+# utils/forest_arrays.py
+"""
+Kompilasi RandomForestClassifier ke array node datar (.npy) yang dibuka lewat
+np.load(mmap_mode="r"). Tree sklearn selalu menyalin node ke memori privat
+saat unpickle, jadi hanya array di file ini yang benar-benar dibagi antar
+proses worker (page cache OS yang sama, satu salinan fisik).
+
+Inferensi menelusuri semua pohon dalam satu pass dan menghasilkan label beserta
+probabilitas, identik bit-per-bit dengan predict/predict_proba sklearn. Engine
+"c" memakai kernel utils/forest_kernel.c (dikompilasi otomatis dengan compiler
+C sistem); engine "numpy" menelusuri semua pasangan (baris, pohon) secara
+vektor dan dipakai bila compiler tidak tersedia.
+"""
+
+import os
+import uuid
+import shutil
+import ctypes
+import hashlib
+import subprocess
+from functools import lru_cache
+
+import numpy as np
+import scipy.sparse as sp
+
+# "auto": kernel C bila bisa dikompilasi, selain itu numpy
+RF_ENGINES = ("auto", "c", "numpy")
+RF_ENGINE  = os.environ.get("RF_ENGINE", "auto")
+
+KERNEL_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "forest_kernel.c")
+KERNEL_DIR    = os.environ.get(
+    "RF_KERNEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "forest_kernel"),
+)
+
+# File per array; index node absolut di seluruh hutan
+ARRAY_FILES = ("nodes", "proba", "roots", "classes")
+
+# Satu record 16 byte per node (4 node per cache line), dibaca langsung oleh forest_kernel.c
+NODE_DTYPE = np.dtype([("left", "<i4"), ("right", "<i4"), ("feature", "<i4"), ("threshold", "<f4")])
+
+# Jumlah langkah traversal sebelum pasangan (baris, pohon) yang sudah di daun dibuang
+COMPACT_EVERY = 8
+
+# Jumlah baris yang dibuat dense sekaligus saat inferensi
+CHUNK_SIZE = 256
+
+# === EXPORT ===
+def float32_floor(threshold):
+    """
+    Threshold float64 -> float32 terbesar yang <= threshold. Untuk x float32,
+    `x <= t` identik dengan `x <= float32_floor(t)`, jadi perbandingan bisa
+    dilakukan di float32 tanpa upcast.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+def export_forest_arrays(rf, out_dir, overwrite=False):
+    """
+    Kompilasi `rf` ke array datar di `out_dir`:
+      nodes   : record NODE_DTYPE per node (threshold float32, lihat float32_floor),
+      proba   : distribusi kelas ternormalisasi per node (n_node, n_class),
+      roots   : index node akar tiap pohon,
+      classes : rf.classes_.
+    Daun menunjuk ke dirinya sendiri (left = right = index daun, threshold +inf),
+    jadi traversal cukup mengulang langkah yang sama tanpa cabang khusus.
+    Ditulis ke folder sementara lalu di-rename, jadi worker yang mengekspor
+    bersamaan tidak pernah membaca folder setengah jadi. Folder yang sudah ada
+    tidak disentuh (proses lain mungkin sedang membacanya), kecuali `overwrite`.
+    """
+    trees  = [est.tree_ for est in rf.estimators_]
+    counts = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots  = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    leaf = np.concatenate([t.children_left < 0 for t in trees])
+    index = np.arange(leaf.size)
+
+    nodes = np.empty(leaf.size, dtype=NODE_DTYPE)
+    nodes["left"]      = np.where(leaf, index, np.concatenate([t.children_left + r for t, r in zip(trees, roots)]))
+    nodes["right"]     = np.where(leaf, index, np.concatenate([t.children_right + r for t, r in zip(trees, roots)]))
+    nodes["feature"]   = np.where(leaf, 0, np.concatenate([t.feature for t in trees]))
+    nodes["threshold"] = float32_floor(np.where(leaf, np.inf, np.concatenate([t.threshold for t in trees])))
+
+    # Normalisasi sama persis dengan DecisionTreeClassifier.predict_proba
+    proba = np.concatenate([t.value[:, 0, :] for t in trees]).astype(np.float64)
+    normalizer = proba.sum(axis=1, keepdims=True)
+    normalizer[normalizer == 0.0] = 1.0
+    proba /= normalizer
+
+    arrays = {"nodes": nodes, "proba": proba, "roots": roots, "classes": np.asarray(rf.classes_)}
+
+    tmp_dir = f"{out_dir}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    old_dir = None
+    if overwrite and os.path.isdir(out_dir):
+        # Pindahkan dulu, hapus setelah rename: file yang sudah di-mmap proses lain tetap valid
+        old_dir = f"{out_dir}.old-{uuid.uuid4().hex}"
+        os.replace(out_dir, old_dir)
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        # Proses lain sudah lebih dulu menulis folder yang sama
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+def is_exported(out_dir, source=None):
+    """True bila semua array ada dan (bila `source` diberikan) lebih baru dari file model."""
+    paths = [os.path.join(out_dir, f"{name}.npy") for name in ARRAY_FILES]
+    if not all(os.path.exists(p) for p in paths):
+        return False
+    return source is None or min(os.path.getmtime(p) for p in paths) >= os.path.getmtime(source)
+
+# === KERNEL ===
+@lru_cache(maxsize=None)
+def load_kernel():
+    """
+    Kompilasi forest_kernel.c ke shared library (sekali, di-cache per isi
+    source) dan muat lewat ctypes. Raise OSError / CalledProcessError bila
+    tidak ada compiler C.
+    """
+    with open(KERNEL_SOURCE, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    lib_path = os.path.join(KERNEL_DIR, f"forest_kernel-{digest}.so")
+
+    if not os.path.exists(lib_path):
+        os.makedirs(KERNEL_DIR, exist_ok=True)
+        tmp_path = f"{lib_path}.tmp-{uuid.uuid4().hex}"
+        compiler = os.environ.get("CC", "cc")
+        subprocess.run([compiler, "-O3", "-shared", "-fPIC", "-o", tmp_path, KERNEL_SOURCE],
+                       check=True, capture_output=True)
+        os.replace(tmp_path, lib_path)
+
+    kernel = ctypes.CDLL(lib_path).forest_accumulate_proba
+    array = lambda dtype: np.ctypeslib.ndpointer(dtype=dtype, flags="C_CONTIGUOUS")
+    kernel.argtypes = [
+        array(NODE_DTYPE), array(np.float64), array(np.int64), ctypes.c_int64, ctypes.c_int64,
+        array(np.float32), ctypes.c_int64, ctypes.c_int64, array(np.float64),
+    ]
+    kernel.restype = None
+    return kernel
+
+def resolve_engine(engine=None):
+    """Engine yang benar-benar dipakai ("c" atau "numpy") untuk `engine` / RF_ENGINE."""
+    engine = engine or RF_ENGINE
+    if engine not in RF_ENGINES:
+        raise ValueError(f"Unknown RF engine '{engine}', expected one of {RF_ENGINES}")
+    if engine == "numpy":
+        return "numpy"
+    try:
+        load_kernel()
+        return "c"
+    except (OSError, subprocess.CalledProcessError) as e:
+        if engine == "c":
+            raise
+        print(f"Could not compile forest kernel, falling back to numpy: {e}")
+        return "numpy"
+
+# === INFERENCE ===
+def _column_blocks(X):
+    """Matriks atau list blok kolom (dense / sparse) -> list (blok, offset kolom)."""
+    blocks, offset = [], 0
+    for block in (X if isinstance(X, (list, tuple)) else [X]):
+        if sp.issparse(block):
+            block = block.tocsr()
+            if not block.has_canonical_format:
+                block = block.copy()
+                block.sum_duplicates()
+        else:
+            block = np.asarray(block)
+            if block.ndim == 1:
+                block = block[:, np.newaxis]
+        blocks.append((block, offset))
+        offset += block.shape[1]
+    return blocks, offset
+
+def _fill_rows(buffer, blocks, start, stop):
+    """Salin baris start:stop semua blok ke `buffer` float32 (CSR di-scatter langsung, tanpa hstack)."""
+    rows = buffer[:stop - start]
+    rows.fill(0.0)
+    for block, offset in blocks:
+        if sp.issparse(block):
+            part = block[start:stop]
+            row_ids = np.repeat(np.arange(stop - start), np.diff(part.indptr))
+            rows[row_ids, offset + part.indices] = part.data
+        else:
+            rows[:, offset:offset + block.shape[1]] = block[start:stop]
+    return rows
+
+class ForestArrays:
+    """Hutan dari array memory-mapped, dengan prediksi identik sklearn."""
+
+    def __init__(self, directory, mmap_mode="r", engine=None):
+        for name in ARRAY_FILES:
+            # np.asarray: view ndarray biasa di atas mmap (tanpa overhead subclass memmap)
+            setattr(self, name, np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)))
+        self.engine = resolve_engine(engine)
+        # Kolom minimum yang dibutuhkan (kernel C membaca x[feature] tanpa cek batas)
+        self.min_features = int(self.nodes["feature"].max()) + 1 if len(self.nodes) else 0
+
+    def apply(self, X):
+        """
+        Index daun (n_sample, n_tree) untuk X dense float32 (engine numpy):
+        semua pasangan (baris, pohon) ditelusuri bersamaan, satu level per langkah.
+        """
+        left, right = self.nodes["left"], self.nodes["right"]
+        feature, threshold = self.nodes["feature"], self.nodes["threshold"]
+
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        node = np.tile(self.roots, n_rows)
+        base = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, len(self.roots))
+        pair = np.arange(node.size)
+        leaves = np.empty_like(node)
+        while node.size:
+            for _ in range(COMPACT_EVERY):
+                go_left = flat[base + feature[node]] <= threshold[node]
+                node = np.where(go_left, left[node], right[node]).astype(np.int64)
+            done = left[node] == node
+            leaves[pair[done]] = node[done]
+            node, base, pair = node[~done], base[~done], pair[~done]
+        return leaves.reshape(n_rows, len(self.roots))
+
+    def _accumulate(self, rows, total):
+        # Akumulasi per pohon (bukan sum(axis=1)) agar urutan penjumlahan sama dengan sklearn
+        if self.engine == "c":
+            load_kernel()(self.nodes, self.proba, self.roots,
+                          len(self.roots), len(self.classes), rows, *rows.shape, total)
+            return
+        leaves = self.apply(rows)
+        for tree in range(leaves.shape[1]):
+            total += self.proba[leaves[:, tree]]
+
+    def predict_with_proba(self, X, chunk_size=CHUNK_SIZE):
+        """
+        Label dan probabilitas kelas dalam satu traversal.
+
+        X: matriks dense/sparse (n_sample, n_feature), atau list blok kolom
+        yang digabung secara horizontal, mis. [fitur_numerik, tfidf_csr].
+        Seperti sklearn, nilai di-cast ke float32 dan probabilitas pohon
+        dijumlah berurutan per pohon sebelum dibagi jumlah pohon.
+        """
+        blocks, n_features = _column_blocks(X)
+        if n_features < self.min_features:
+            raise ValueError(f"X has {n_features} features, but the forest uses feature index {self.min_features - 1}")
+        n_rows = blocks[0][0].shape[0] if blocks else 0
+        buffer = np.empty((min(chunk_size, n_rows), n_features), dtype=np.float32)
+
+        out = np.zeros((n_rows, len(self.classes)), dtype=np.float64)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            self._accumulate(_fill_rows(buffer, blocks, start, stop), out[start:stop])
+        out /= len(self.roots)
+        return self.classes.take(np.argmax(out, axis=1), axis=0), out
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+class SklearnForest:
+    """
+    Antarmuka predict_with_proba di atas RandomForestClassifier sklearn biasa,
+    dipakai bila array memory-mapped tidak bisa diekspor atau dibuka.
+    """
+
+    engine = "sklearn"
+
+    def __init__(self, rf):
+        self.rf = rf
+        self.classes = rf.classes_
+
+    def predict_with_proba(self, X, chunk_size=None):
+        if isinstance(X, (list, tuple)):
+            X = sp.hstack(list(X))
+        proba = self.rf.predict_proba(X)
+        # Sama dengan rf.predict: argmax probabilitas, tanpa traversal kedua
+        return self.classes.take(np.argmax(proba, axis=1), axis=0), proba
+
+    def predict_proba(self, X):
+        return self.predict_with_proba(X)[1]
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
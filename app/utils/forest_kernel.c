@@ -0,0 +1,34 @@
+/* utils/forest_kernel.c
+ *
+ * Kernel C untuk utils/forest_arrays.py: telusuri semua pohon untuk setiap
+ * baris dense float32 dan jumlahkan probabilitas daun ke `out`, berurutan per
+ * pohon seperti sklearn (tanpa -ffast-math, jadi urutan penjumlahan tetap).
+ * Dikompilasi otomatis saat pertama dipakai dan dimuat lewat ctypes.
+ */
+#include <stdint.h>
+
+/* Harus sama dengan NODE_DTYPE di forest_arrays.py */
+typedef struct {
+    int32_t left, right, feature;
+    float threshold;
+} node_t;
+
+void forest_accumulate_proba(
+    const node_t *nodes, const double *proba, const int64_t *roots, int64_t n_trees, int64_t n_classes,
+    const float *X, int64_t n_rows, int64_t n_features, double *out)
+{
+    /* Pohon di loop luar: node satu pohon tetap di cache selama semua baris lewat */
+    for (int64_t t = 0; t < n_trees; t++) {
+        for (int64_t i = 0; i < n_rows; i++) {
+            const float *x = X + i * n_features;
+            int32_t node = (int32_t) roots[t];
+            /* Daun menunjuk ke dirinya sendiri */
+            while (nodes[node].left != node)
+                node = x[nodes[node].feature] <= nodes[node].threshold ? nodes[node].left : nodes[node].right;
+            const double *p = proba + (int64_t) node * n_classes;
+            double *total = out + i * n_classes;
+            for (int64_t c = 0; c < n_classes; c++)
+                total[c] += p[c];
+        }
+    }
+}
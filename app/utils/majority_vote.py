@@ -1,128 +1,137 @@
 # utils/majority_vote.py
 
-import os
+import numpy as np
 import pandas as pd
 
-def run_majority_vote(
-    pred_df: pd.DataFrame,
-    enriched_df: pd.DataFrame
-) -> pd.DataFrame:
-    """
-    Jalankan majority vote per Tokoh, menggunakan label Bahasa Indonesia:
-      - "Protagonis"  (sebelumnya "protagonist")
-      - "Antagonis"   (sebelumnya "antagonist")
-      - "Lainnya"     (sebelumnya "others")
-    """
+from utils.output_sinks import DEFAULT_SINK
 
-    majority_out_full = "majority/final_predicted_majority_sorted_custom.csv"
-    out_csv_min      = "majority/final_predicted_majority_minimal.csv"
-    out_csv_full     = "majority/final_normalized_labeled.csv"
+# Nama file untuk setiap frame hasil, bila disimpan lewat sink
+OUTPUT_FILES = {
+    "final"  : "final_predicted_majority_sorted_custom.csv",
+    "minimal": "final_predicted_majority_minimal.csv",
+    "labeled": "final_normalized_labeled.csv",
+}
 
-    df = pred_df.copy()
+def choose_per_story(agg, mask, sort_cols, asc):
+    """
+    Untuk setiap cerita yang punya baris `mask`, index baris yang sama dengan
+    agg[mask & cerita].sort_values(sort_cols, ascending=asc).index[0].
+    """
+    cand = agg.loc[mask, ["story_id"] + sort_cols]
+    if cand.empty:
+        return cand.index
+
+    # Sort beberapa kolom di pandas stabil, jadi seri dimenangkan baris paling awal
+    ordered = cand.sort_values(["story_id"] + sort_cols, ascending=[True] + asc)
+    picked = ordered.groupby("story_id", sort=False).head(1)
+    picked = pd.Series(picked.index, index=picked["story_id"].to_numpy())
+
+    if len(sort_cols) == 1:
+        # Sort satu kolom memakai quicksort (tidak stabil): bila nilai teratas seri,
+        # ulangi sort yang sama persis agar pilihannya identik
+        col = sort_cols[0]
+        top = cand.groupby("story_id")[col].transform("min" if asc[0] else "max")
+        tied = (cand[col] == top).groupby(cand["story_id"]).transform("sum") > 1
+        tied_stories = cand.loc[tied, "story_id"].unique()
+        for sid, sub in cand[cand["story_id"].isin(tied_stories)].groupby("story_id"):
+            picked[sid] = sub.sort_values(sort_cols, ascending=asc).index[0]
+
+    return pd.Index(picked.to_numpy())
+
+def aggregate_predictions(pred_df: pd.DataFrame, enriched_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregat per Tokoh yang dipakai aturan majority vote, urut (story_id, person):
+    jumlah prediksi per label (pro_cnt, ant_cnt, oth_cnt), total confidence
+    (pro_conf_total, ant_conf_total) dan total mention_count (mention_total).
+    """
+    df = pred_df
 
     # -- AGGREGATION --
     # Hitung berapa kali tiap Tokoh diprediksi sebagai Protagonis / Antagonis / Lainnya
-    agg_fields = {
-        "pro_cnt" : ("predicted_type", lambda s: (s == "Protagonis").sum()),
-        "ant_cnt" : ("predicted_type", lambda s: (s == "Antagonis").sum()),
-        "oth_cnt" : ("predicted_type", lambda s: (s == "Lainnya").sum()),
-    }
+    # (indikator per baris lalu satu groupby-sum untuk semua kolom)
+    agg_input = pd.DataFrame({
+        "story_id": df["story_id"],
+        "person"  : df["person"],
+        "pro_cnt" : (df["predicted_type"] == "Protagonis").astype("int64"),
+        "ant_cnt" : (df["predicted_type"] == "Antagonis").astype("int64"),
+        "oth_cnt" : (df["predicted_type"] == "Lainnya").astype("int64"),
+    })
 
     # Jika kolom confidence ada, gunakan; kalau tidak, pakai 0
-    if "conf_Protagonis" in df.columns:
-        agg_fields["pro_conf_total"] = ("conf_Protagonis", "sum")
-    else:
-        agg_fields["pro_conf_total"] = ("predicted_type", lambda s: 0)
-
-    if "conf_Antagonis" in df.columns:
-        agg_fields["ant_conf_total"] = ("conf_Antagonis", "sum")
-    else:
-        agg_fields["ant_conf_total"] = ("predicted_type", lambda s: 0)
+    agg_input["pro_conf_total"] = df["conf_Protagonis"] if "conf_Protagonis" in df.columns else 0
+    agg_input["ant_conf_total"] = df["conf_Antagonis"] if "conf_Antagonis" in df.columns else 0
 
     if "mention_count" in df.columns:
-        agg_fields["mention_total"] = ("mention_count", "sum")
+        agg_input["mention_total"] = df["mention_count"]
     else:
         # fallback: gabung dari enriched_df
         merged = df.merge(
             enriched_df[["story_id", "person", "sentence_id", "mention_count"]],
             on=["story_id", "person"], how="left"
         )
-        df["mention_count"] = merged["mention_count"].fillna(0)
-        agg_fields["mention_total"] = ("mention_count", "sum")
-
-    agg = df.groupby(["story_id", "person"]).agg(**agg_fields).reset_index()
-
-    # Fungsi majority: jika tidak ada pro/ant, label = "Lainnya"
-    def majority(row):
-        if row.pro_cnt == 0 and row.ant_cnt == 0:
-            return "Lainnya"
-        # cari maksimum di antara pro_cnt, ant_cnt, oth_cnt
-        pilihan = {
-            "Protagonis": row.pro_cnt,
-            "Antagonis" : row.ant_cnt,
-            "Lainnya"   : row.oth_cnt
-        }
-        return max(pilihan, key=lambda k: pilihan[k])
-
-    agg["label"] = agg.apply(majority, axis=1)
-
-    # LOGIKA FINAL
+        agg_input["mention_total"] = merged["mention_count"].fillna(0)
+
+    return agg_input.groupby(["story_id", "person"]).sum().reset_index()
+
+def label_characters(agg: pd.DataFrame, aliases: pd.DataFrame) -> pd.DataFrame:
+    """
+    Terapkan aturan majority vote ke agregat dari `aggregate_predictions` dan
+    kembalikan satu baris per Tokoh. `aliases`: story_id, person, aliases.
+    """
+    agg = agg.copy()
+
+    # Majority: jika tidak ada pro/ant, label = "Lainnya"; selain itu label dengan
+    # jumlah terbanyak, seri dimenangkan urutan Protagonis, Antagonis, Lainnya
+    pro, ant, oth = agg["pro_cnt"], agg["ant_cnt"], agg["oth_cnt"]
+    agg["label"] = np.select(
+        [(pro == 0) & (ant == 0), (pro >= ant) & (pro >= oth), ant >= oth],
+        ["Lainnya", "Protagonis", "Antagonis"],
+        default="Lainnya",
+    ).astype(object)
+
+    # LOGIKA FINAL (setiap aturan diterapkan ke semua cerita sekaligus)
     REL_THRESH = 0.2
     THR_ANT   = 0.4
 
-    def choose(sub, sort_cols, asc):
-        return sub.sort_values(sort_cols, ascending=asc).index[0]
-
-    for sid, idx in agg.groupby("story_id").groups.items():
-        sub = agg.loc[idx]
-
-        # Pastikan selalu ada satu Protagonis
-        if (sub.label == "Protagonis").sum() == 0:
-            pro_cand = sub[sub.pro_cnt > 0]
-            cand = (choose(pro_cand, ["pro_cnt", "pro_conf_total", "mention_total"], asc=[False]*3)
-                    if not pro_cand.empty
-                    else choose(sub, ["mention_total"], asc=[False]))
-            agg.loc[cand, "label"] = "Protagonis"
-
-        sub = agg.loc[idx]
-        # Pastikan selalu ada satu Antagonis
-        if (sub.label == "Antagonis").sum() == 0:
-            ant_cand = sub[sub.ant_cnt > 0]
-            if not ant_cand.empty:
-                cand = choose(ant_cand, ["ant_cnt", "ant_conf_total", "mention_total"], asc=[False]*3)
-                agg.loc[cand, "label"] = "Antagonis"
-
-        sub = agg.loc[idx]
-        # Jika belum ada Antagonis, coba threshold confidence
-        if (sub.label == "Antagonis").sum() == 0:
-            others = sub[sub.label == "Lainnya"].copy()
-            others["ant_conf_avg"] = others.ant_conf_total / others.oth_cnt.clip(lower=1)
-            cand_conf = others[others.ant_conf_avg >= THR_ANT]
-            if not cand_conf.empty:
-                cand = choose(cand_conf, ["ant_conf_avg", "ant_conf_total", "mention_total"], asc=[False]*3)
-                agg.loc[cand, "label"] = "Antagonis"
-
-        sub = agg.loc[idx]
-        # Pastikan sekali lagi ada minimal satu Protagonis
-        if (sub.label == "Protagonis").sum() == 0:
-            cand = choose(sub, ["mention_total"], asc=[False])
-            agg.loc[cand, "label"] = "Protagonis"
-
-        sub = agg.loc[idx]
-        # Jika belum ada Antagonis, cari berdasarkan mention_total relatif
-        if (sub.label == "Antagonis").sum() == 0:
-            max_m = sub.mention_total.max()
-            cand_sub = sub[(sub.label == "Lainnya") & (sub.mention_total >= REL_THRESH * max_m)]
-            if not cand_sub.empty:
-                cand = choose(cand_sub, ["pro_conf_total", "mention_total"], asc=[True, False])
-                agg.loc[cand, "label"] = "Antagonis"
+    story = agg["story_id"]
+
+    def lacks(label):
+        return ~(agg["label"] == label).groupby(story).transform("any")
+
+    # Pastikan selalu ada satu Protagonis
+    need = lacks("Protagonis")
+    has_pro = (agg.pro_cnt > 0).groupby(story).transform("any")
+    agg.loc[choose_per_story(agg, need & (agg.pro_cnt > 0),
+                             ["pro_cnt", "pro_conf_total", "mention_total"], [False]*3), "label"] = "Protagonis"
+    agg.loc[choose_per_story(agg, need & ~has_pro, ["mention_total"], [False]), "label"] = "Protagonis"
+
+    # Pastikan selalu ada satu Antagonis
+    need = lacks("Antagonis")
+    agg.loc[choose_per_story(agg, need & (agg.ant_cnt > 0),
+                             ["ant_cnt", "ant_conf_total", "mention_total"], [False]*3), "label"] = "Antagonis"
+
+    # Jika belum ada Antagonis, coba threshold confidence
+    need = lacks("Antagonis")
+    scored = agg.assign(ant_conf_avg=agg.ant_conf_total / agg.oth_cnt.clip(lower=1))
+    cand = need & (agg.label == "Lainnya") & (scored.ant_conf_avg >= THR_ANT)
+    agg.loc[choose_per_story(scored, cand,
+                             ["ant_conf_avg", "ant_conf_total", "mention_total"], [False]*3), "label"] = "Antagonis"
+
+    # Pastikan sekali lagi ada minimal satu Protagonis
+    need = lacks("Protagonis")
+    agg.loc[choose_per_story(agg, need, ["mention_total"], [False]), "label"] = "Protagonis"
+
+    # Jika belum ada Antagonis, cari berdasarkan mention_total relatif
+    need = lacks("Antagonis")
+    max_m = agg.mention_total.groupby(story).transform("max")
+    cand = need & (agg.label == "Lainnya") & (agg.mention_total >= REL_THRESH * max_m)
+    agg.loc[choose_per_story(agg, cand, ["pro_conf_total", "mention_total"], [True, False]), "label"] = "Antagonis"
 
     # Tambahkan kolom bantu untuk sorting agar urutan Tokoh-1, Tokoh-2, dst.
     agg["person_num"] = agg["person"].str.extract(r"Tokoh-(\d+)", expand=False).astype(int)
 
     # Merge kembali kolom "aliases" (list alias) dari df‐awal
-    original = df[["story_id", "person", "aliases"]].drop_duplicates()
-    agg = agg.merge(original, on=["story_id", "person"], how="left")
+    agg = agg.merge(aliases, on=["story_id", "person"], how="left")
 
     # Susun kolom final
     final_df = (
@@ -136,12 +145,28 @@ def run_majority_vote(
     cols = ["story_id", "person", "aliases", "predicted_type"] + \
            [c for c in final_df.columns if c not in ["story_id", "person", "aliases", "predicted_type"]]
     final_df = final_df[cols]
+    return final_df
 
-    os.makedirs("majority", exist_ok=True)
-    final_df.to_csv(majority_out_full, index=False)
+def run_majority_vote(
+    pred_df: pd.DataFrame,
+    enriched_df: pd.DataFrame,
+    sink=DEFAULT_SINK
+) -> dict:
+    """
+    Jalankan majority vote per Tokoh, menggunakan label Bahasa Indonesia:
+      - "Protagonis"  (sebelumnya "protagonist")
+      - "Antagonis"   (sebelumnya "antagonist")
+      - "Lainnya"     (sebelumnya "others")
+
+    Returns:
+        dict berisi DataFrame: final (satu baris per Tokoh), minimal
+        (story_id, person, predicted_type), dan labeled (enriched_df + label).
+        Ketiganya juga diserahkan ke `sink` (lihat utils/output_sinks.py).
+    """
+    agg = aggregate_predictions(pred_df, enriched_df)
+    final_df = label_characters(agg, pred_df[["story_id", "person", "aliases"]].drop_duplicates())
 
     df_min = final_df[["story_id", "person", "predicted_type"]]
-    df_min.to_csv(out_csv_min, index=False)
 
     # Merge final_df (predicted_type) kembali ke enriched_df
     df_merge = enriched_df.merge(df_min, on=["story_id", "person"], how="left")
@@ -154,6 +179,18 @@ def run_majority_vote(
         "is_primary_in_sentence"
     ]
     df_merge = df_merge[final_columns]
-    df_merge.to_csv(out_csv_full, index=False)
 
-    return final_df
+    frames = {"final": final_df, "minimal": df_min, "labeled": df_merge}
+    sink.write({OUTPUT_FILES[name]: frame for name, frame in frames.items()})
+    return frames
+
+def majority_vote_from_aggregates(agg: pd.DataFrame, aliases: pd.DataFrame, sink=DEFAULT_SINK) -> dict:
+    """
+    Seperti run_majority_vote, tetapi dari agregat per Tokoh (format
+    `aggregate_predictions`) tanpa baris per kalimat, mis. dari mode streaming.
+    Frame "labeled" membutuhkan enriched_df, jadi hanya final & minimal.
+    """
+    final_df = label_characters(agg, aliases)
+    frames = {"final": final_df, "minimal": final_df[["story_id", "person", "predicted_type"]]}
+    sink.write({OUTPUT_FILES[name]: frame for name, frame in frames.items()})
+    return frames
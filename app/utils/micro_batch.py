@@ -0,0 +1,79 @@
+# utils/micro_batch.py
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+# === MICRO-BATCHING ===
+class MicroBatcher:
+    """
+    Gabungkan permintaan dari banyak thread menjadi satu panggilan `fn(items)`.
+
+    Batch dikirim begitu total ukurannya (`size(item)`, mis. jumlah kalimat)
+    mencapai `max_batch_size`, atau `max_wait_ms` setelah item tertua masuk,
+    mana yang lebih dulu. Jadi tambahan latensi karena menunggu teman batch
+    paling lama `max_wait_ms`; saat worker sibuk, item yang sudah antre langsung
+    diambil tanpa menunggu lagi. `fn` menerima list item dan mengembalikan list
+    hasil dengan urutan yang sama. Model dipanggil dari satu thread worker saja.
+    """
+
+    def __init__(self, fn, max_batch_size=64, max_wait_ms=10, size=len, name="micro-batch"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.size = size
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = self.items = 0
+
+    def submit(self, item):
+        """Masukkan satu item ke antrean; hasilnya lewat Future."""
+        future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put((time.monotonic(), item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _collect(self):
+        arrived, item, future = self._queue.get()
+        batch, units = [(item, future)], self.size(item)
+        deadline = arrived + self.max_wait
+        while units < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                # Setelah deadline, hanya ambil item yang sudah antre
+                _, item, future = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append((item, future))
+            units += self.size(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Ulangi per item agar satu permintaan bermasalah tidak menggagalkan yang lain
+                for item, future in batch:
+                    try:
+                        future.set_result(self.fn([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
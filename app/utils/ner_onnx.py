@@ -0,0 +1,85 @@
+# utils/ner_onnx.py
+
+import os
+
+# === PATHS ===
+NER_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "ner_model")
+ONNX_DIR      = NER_MODEL_DIR + "_onnx"
+ONNX_INT8_DIR = NER_MODEL_DIR + "_onnx_int8"
+
+ONNX_RAW_FILE  = "model.onnx"
+ONNX_FILE      = "model_optimized.onnx"
+ONNX_INT8_FILE = "model_quantized.onnx"
+
+def _require_optimum():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Backend ONNX membutuhkan paket tambahan: pip install \"optimum[onnxruntime]\""
+        ) from e
+
+# === EXPORT ===
+def export_ner_onnx(quantize=False, overwrite=False):
+    """
+    Konversi models/ner_model ke graph ONNX (models/ner_model_onnx,
+    versi mentah dan versi teroptimasi), dan bila `quantize=True` juga
+    buat versi dynamic int8 (models/ner_model_onnx_int8).
+
+    Returns:
+        str: folder model ONNX yang siap dipakai.
+    """
+    _require_optimum()
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTOptimizer, ORTQuantizer
+    from optimum.onnxruntime.configuration import OptimizationConfig, AutoQuantizationConfig
+
+    tokenizer = AutoTokenizer.from_pretrained(NER_MODEL_DIR)
+
+    if overwrite or not os.path.exists(os.path.join(ONNX_DIR, ONNX_FILE)):
+        model = ORTModelForTokenClassification.from_pretrained(NER_MODEL_DIR, export=True)
+        model.save_pretrained(ONNX_DIR)
+        optimizer = ORTOptimizer.from_pretrained(model)
+        optimizer.optimize(
+            save_dir=ONNX_DIR,
+            optimization_config=OptimizationConfig(optimization_level=2),
+        )
+        tokenizer.save_pretrained(ONNX_DIR)
+
+    if not quantize:
+        return ONNX_DIR
+
+    if overwrite or not os.path.exists(os.path.join(ONNX_INT8_DIR, ONNX_INT8_FILE)):
+        # Kuantisasi dari graph hasil ekspor (bukan yang sudah di-fuse),
+        # karena operator fused tidak dikenali oleh quantizer ONNX Runtime
+        quantizer = ORTQuantizer.from_pretrained(ONNX_DIR, file_name=ONNX_RAW_FILE)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=ONNX_INT8_DIR, quantization_config=qconfig)
+        tokenizer.save_pretrained(ONNX_INT8_DIR)
+
+    return ONNX_INT8_DIR
+
+# === SERVE ===
+def load_onnx_ner_pipeline(quantize=False):
+    """
+    Bangun pipeline token-classification di atas ONNX Runtime (CPU).
+    Model diekspor otomatis bila belum ada di disk.
+    """
+    _require_optimum()
+    from optimum.onnxruntime import ORTModelForTokenClassification
+    from optimum.pipelines import pipeline
+    from utils.tokenization import get_fast_tokenizer
+
+    model_dir = export_ner_onnx(quantize=quantize)
+    file_name = ONNX_INT8_FILE if quantize else ONNX_FILE
+
+    tokenizer = get_fast_tokenizer(model_dir)
+    model = ORTModelForTokenClassification.from_pretrained(model_dir, file_name=file_name)
+
+    return pipeline(
+        "token-classification",
+        model=model,
+        tokenizer=tokenizer,
+        accelerator="ort",
+        aggregation_strategy="simple",
+    )
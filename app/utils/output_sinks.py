@@ -0,0 +1,99 @@
+# utils/output_sinks.py
+
+import os
+import uuid
+import queue
+import atexit
+import shutil
+import threading
+from datetime import datetime
+
+# Bila diisi, hasil majority vote ditulis (di background) ke <MAJORITY_OUTPUT_DIR>/<run_id>/
+MAJORITY_OUTPUT_DIR = os.environ.get("MAJORITY_OUTPUT_DIR")
+
+# === SINKS ===
+class NullSink:
+    """Tidak menyimpan apa pun (default)."""
+
+    def write(self, frames):
+        return None
+
+    def close(self):
+        pass
+
+class RunDirectorySink:
+    """
+    Tulis setiap panggilan ke folder run sendiri, `<root>/<run_id>/<nama file>`,
+    jadi pemanggil yang berjalan bersamaan tidak saling menimpa. Folder ditulis
+    ke lokasi sementara lalu di-rename, sehingga selalu lengkap atau tidak ada.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def new_run_id(self):
+        return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    def write(self, frames, run_id=None):
+        """`frames`: dict nama file -> DataFrame. Mengembalikan folder run."""
+        run_dir = os.path.join(self.root, run_id or self.new_run_id())
+        tmp_dir = f"{run_dir}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_dir)
+        try:
+            for filename, df in frames.items():
+                df.to_csv(os.path.join(tmp_dir, filename), index=False)
+            shutil.rmtree(run_dir, ignore_errors=True)
+            os.replace(tmp_dir, run_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return run_dir
+
+    def close(self):
+        pass
+
+class BackgroundSink:
+    """
+    Serahkan penulisan ke thread background agar pemanggil tidak menunggu
+    serialisasi CSV. DataFrame disalin saat diserahkan, jadi pemanggil boleh
+    mengubahnya lagi. Penulisan yang masih antre diselesaikan saat `close()` / exit.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            frames = self._queue.get()
+            try:
+                if frames is None:
+                    return
+                self.sink.write(frames)
+            except Exception as e:
+                print(f"Could not write outputs: {e}")
+            finally:
+                self._queue.task_done()
+
+    def write(self, frames):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="output-sink", daemon=True)
+                self._thread.start()
+        # Salin di thread pemanggil: frame aslinya dikembalikan ke pemanggil (mis. run_majority_vote)
+        self._queue.put({name: df.copy() for name, df in frames.items()})
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+        self.sink.close()
+
+DEFAULT_SINK = BackgroundSink(RunDirectorySink(MAJORITY_OUTPUT_DIR)) if MAJORITY_OUTPUT_DIR else NullSink()
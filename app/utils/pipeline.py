@@ -0,0 +1,175 @@
+# utils/pipeline.py
+
+import pandas as pd
+
+from utils.preprocessing import preprocess_folktale
+from utils.artifact_cache import ARTIFACT_CACHE
+
+CLASSIFIERS = ("classical", "bert")
+
+# === HELPERS ===
+def sentences_from_tokens(preprocessed_df):
+    return preprocessed_df.groupby("sentence_id")["word"].apply(list).tolist()
+
+def clusters_to_frame(clusters, story_id=1):
+    return pd.DataFrame(
+        [{"story_id": story_id, "person": k, "aliases": v} for k, v in clusters.items()],
+        columns=["story_id", "person", "aliases"],
+    )
+
+def attach_sentence_ids(merged_df, character_df):
+    """Tambahkan kolom sentence_ids (list[int]) ke setiap Tokoh berdasarkan aliasnya."""
+    alias_sent_map = (
+        character_df[["Normalized", "sentence_id"]]
+            .explode("Normalized").dropna()
+            .groupby("Normalized")["sentence_id"]
+            .agg(lambda x: sorted(set(x))).to_dict()
+    )
+    merged_df["sentence_ids"] = merged_df["aliases"].apply(
+        lambda alist: sorted({sid
+                              for alias in alist
+                              for sid in alias_sent_map.get(alias, [])})
+    )
+    return merged_df
+
+# === STAGES ===
+def stage_preprocess(story_text, story_id=1, title="uploaded", tokenizer=None):
+    """(tabel token, tabel kalimat) dari preprocess_folktale."""
+    return preprocess_folktale(story_text, story_id=story_id, title=title, tokenizer=tokenizer)
+
+def lazy_preprocess(story_text, story_id=1, title="uploaded", tokenizer=None):
+    """
+    Kembalikan fungsi `get("tokens" | "sentences")` yang menjalankan preprocessing
+    paling banyak sekali, agar tahap "preprocess" dan "sentences" bisa di-cache
+    terpisah tanpa tokenisasi ganda.
+    """
+    tables = {}
+    def get(name):
+        if not tables:
+            tables["tokens"], tables["sentences"] = stage_preprocess(story_text, story_id, title, tokenizer)
+        return tables[name]
+    return get
+
+def stage_ner(preprocessed_df, ner_backend=None):
+    return stage_ner_sentences(sentences_from_tokens(preprocessed_df), ner_backend)
+
+def stage_ner_sentences(token_lists, ner_backend=None):
+    from utils.predict import extract_characters
+    return extract_characters(token_lists, backend=ner_backend)
+
+def stage_cluster(character_df, story_id=1):
+    from utils.alias_clustering import cluster_character_aliases
+    clusters = cluster_character_aliases(character_df["Normalized"].tolist())
+    return clusters_to_frame(clusters, story_id)
+
+def stage_role_merge(cluster_df, character_df):
+    from utils.sense_mapper import apply_role_based_merging
+    merged_df = apply_role_based_merging(cluster_df)
+    return attach_sentence_ids(merged_df, character_df)
+
+def stage_features(merged_df, preprocessed_df, sentences_df=None):
+    from utils.feature_engineering import add_features_for_classification
+    return add_features_for_classification(merged_df, preprocessed_df, sentences_df)
+
+def stage_classify(enriched_df, classifier="classical", quantize=False):
+    if classifier == "classical":
+        from utils.classical_classifier import classify_characters
+        return classify_characters(enriched_df)
+    from utils.bert_classifier import classify_characters
+    return classify_characters(enriched_df.copy(), quantize=quantize)
+
+def stage_vote(prediction_df, enriched_df, classifier="classical"):
+    if classifier == "classical":
+        from utils.majority_vote import run_majority_vote
+        return run_majority_vote(prediction_df, enriched_df)["final"]
+    from utils.confidence_vote import confidence_weighted_vote
+    return confidence_weighted_vote(prediction_df.copy())
+
+def stage_configs(story_id=1, title="uploaded", classifier="classical", ner_backend=None, quantize=None,
+                  tokenizer=None):
+    """
+    Konfigurasi (bagian dari key cache) untuk setiap tahap. Nilai default dari
+    environment di-resolve di sini agar key tidak ambigu antar proses.
+    """
+    from utils.predict import NER_BACKEND
+    from utils.preprocessing import PREPROCESS_TOKENIZER
+    # Tokenizer menentukan kalimat & kata, jadi ikut di key semua tahap sesudahnya
+    tokenizer = tokenizer or PREPROCESS_TOKENIZER
+    ner_config = {"story_id": story_id, "ner_backend": ner_backend or NER_BACKEND, "tokenizer": tokenizer}
+    if classifier == "bert":
+        from utils.bert_classifier import BERT_QUANTIZE
+        quantize = BERT_QUANTIZE if quantize is None else quantize
+    class_config = {**ner_config, "classifier": classifier, "quantize": bool(quantize)}
+    return {
+        "preprocess": {"story_id": story_id, "title": title, "tokenizer": tokenizer},
+        "sentences": {"story_id": story_id, "title": title, "tokenizer": tokenizer},
+        "ner": ner_config,
+        "cluster": ner_config,
+        "role_merge": ner_config,
+        "features": ner_config,
+        f"classify_{classifier}": class_config,
+        f"vote_{classifier}": class_config,
+    }
+
+def _finish_empty(results):
+    # Tidak ada tokoh terdeteksi: tahap berikutnya dikembalikan sebagai DataFrame kosong
+    for name in ("clusters", "merged", "enriched", "predictions", "final"):
+        results.setdefault(name, pd.DataFrame())
+    return results
+
+def _run_stage(cache, stage, story_text, compute, config):
+    if cache is None:
+        return compute()
+    df, _ = cache.cached(stage, story_text, compute, config)
+    return df
+
+# === FULL PIPELINE ===
+def run_story(story_text, story_id=1, title="uploaded", classifier="classical",
+              ner_backend=None, quantize=None, tokenizer=None, cache=ARTIFACT_CACHE,
+              extract=None, classify=None):
+    """
+    Jalankan seluruh pipeline untuk satu cerita. Output setiap tahap disimpan
+    di `cache` (ArtifactCache), jadi cerita yang sama dikembalikan dari disk.
+    Gunakan `cache=None` untuk selalu menghitung ulang. Untuk cerita yang sangat
+    panjang, lihat utils/streaming.py (run_story_streaming, memori terbatas).
+
+    `extract(token_lists)` dan `classify(enriched_df)` menggantikan pemanggilan
+    model NER / classifier langsung, mis. micro-batch di service/server.py.
+
+    Returns:
+        dict berisi DataFrame: preprocessed, sentences, characters, clusters,
+        merged, enriched, predictions, final.
+    """
+    if classifier not in CLASSIFIERS:
+        raise ValueError(f"Unknown classifier '{classifier}', expected one of {CLASSIFIERS}")
+
+    configs = stage_configs(story_id, title, classifier, ner_backend, quantize, tokenizer)
+    ner_backend = configs["ner"]["ner_backend"]
+    tokenizer = configs["preprocess"]["tokenizer"]
+    quantize = configs[f"classify_{classifier}"]["quantize"]
+    r = {}
+
+    def run(stage, compute):
+        return _run_stage(cache, stage, story_text, compute, configs[stage])
+
+    preprocess = lazy_preprocess(story_text, story_id, title, tokenizer)
+    r["preprocessed"] = run("preprocess", lambda: preprocess("tokens"))
+    r["sentences"]    = run("sentences", lambda: preprocess("sentences"))
+    if extract is None:
+        extract = lambda token_lists: stage_ner_sentences(token_lists, ner_backend)
+    r["characters"]   = run("ner", lambda: extract(sentences_from_tokens(r["preprocessed"])))
+    if r["characters"].empty:
+        return _finish_empty(r)
+
+    r["clusters"] = run("cluster", lambda: stage_cluster(r["characters"], story_id))
+    r["merged"]   = run("role_merge", lambda: stage_role_merge(r["clusters"], r["characters"]))
+    r["enriched"] = run("features", lambda: stage_features(r["merged"], r["preprocessed"], r["sentences"]))
+    if r["enriched"].empty:
+        return _finish_empty(r)
+
+    if classify is None:
+        classify = lambda enriched_df: stage_classify(enriched_df, classifier, quantize)
+    r["predictions"] = run(f"classify_{classifier}", lambda: classify(r["enriched"]))
+    r["final"]       = run(f"vote_{classifier}",
+                           lambda: stage_vote(r["predictions"], r["enriched"], classifier))
+    return r
@@ -1,41 +1,85 @@
 import torch
 import pandas as pd
 import numpy as np
-from transformers import AutoTokenizer, AutoModelForTokenClassification, TokenClassificationPipeline
+from transformers import AutoModelForTokenClassification, TokenClassificationPipeline
 import streamlit as st
 import os
 from utils.alias_normalizer import normalize_alias_custom
+from utils.tokenization import get_fast_tokenizer
+
+# Jumlah kalimat per batch untuk pipeline NER
+NER_BATCH_SIZE = 16
+
+# Backend NER: "torch" (default), "onnx", atau "onnx-int8" (khusus CPU)
+NER_BACKEND = os.environ.get("NER_BACKEND", "torch")
+NER_BACKENDS = ("torch", "onnx", "onnx-int8")
 
 @st.cache_resource
 def load_ner_model():
     base = os.path.dirname(os.path.dirname(__file__))
     model_path = os.path.join(base, "models", "ner_model")
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    tokenizer = get_fast_tokenizer(model_path)
     model = AutoModelForTokenClassification.from_pretrained(model_path)
     return tokenizer, model
 
-def extract_characters(token_lists):
+@st.cache_resource
+def load_ner_pipeline(backend="torch"):
+    if backend not in NER_BACKENDS:
+        raise ValueError(f"Unknown NER backend '{backend}', expected one of {NER_BACKENDS}")
+
+    if backend != "torch":
+        from utils.ner_onnx import load_onnx_ner_pipeline
+        return load_onnx_ner_pipeline(quantize=(backend == "onnx-int8"))
+
     tokenizer, model = load_ner_model()
     model.eval()
 
-    ner_pipeline = TokenClassificationPipeline(
+    return TokenClassificationPipeline(
         model=model,
         tokenizer=tokenizer,
         aggregation_strategy="simple",
         device=0 if torch.cuda.is_available() else -1
     )
 
-    raw_results = []
+def _run_ner_batch(ner_pipeline, batch):
+    """
+    Jalankan NER untuk satu batch [(index, kalimat), ...].
+    Jika batch gagal, ulangi per kalimat agar satu kalimat bermasalah
+    tidak membuang hasil kalimat lain di batch yang sama.
+    """
+    sentences = [sentence for _, sentence in batch]
+    try:
+        outputs = ner_pipeline(sentences, batch_size=len(sentences))
+        return [(i, preds) for (i, _), preds in zip(batch, outputs)]
+    except Exception:
+        pass
 
-    for i, tokens in enumerate(token_lists):
-        sentence = " ".join(tokens)
+    results = []
+    for i, sentence in batch:
         try:
-            preds = ner_pipeline(sentence)
+            results.append((i, ner_pipeline(sentence)))
         except Exception as e:
             print(f"NER failed on sentence {i}: {e}")
-            continue
+    return results
+
+def extract_characters(token_lists, batch_size=NER_BATCH_SIZE, backend=None):
+    ner_pipeline = load_ner_pipeline(backend or NER_BACKEND)
+
+    sentences = [" ".join(tokens) for tokens in token_lists]
+
+    # Urutkan berdasarkan panjang agar padding per batch minimal
+    order = sorted(range(len(sentences)), key=lambda i: len(token_lists[i]))
+
+    preds_per_sentence = {}
+    for start in range(0, len(order), batch_size):
+        batch = [(i, sentences[i]) for i in order[start:start + batch_size]]
+        preds_per_sentence.update(_run_ner_batch(ner_pipeline, batch))
+
+    raw_results = []
 
-        for pred in preds:
+    # Kembalikan ke urutan kalimat asli
+    for i, sentence in enumerate(sentences):
+        for pred in preds_per_sentence.get(i, []):
             if pred["entity_group"] == "PER":
                 raw_char = pred["word"].replace("##", "").strip()
                 norm_char = normalize_alias_custom(raw_char)
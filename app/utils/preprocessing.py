@@ -1,10 +1,48 @@
+import os
 import re
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-# Ensure punkt tokenizer is downloaded
-nltk.download('punkt')
+from utils import folktale_tokenizer
+
+# "nltk": Punkt + word_tokenize (butuh data punkt), "regex": utils/folktale_tokenizer (offline)
+TOKENIZERS = ("nltk", "regex")
+PREPROCESS_TOKENIZER = os.environ.get("PREPROCESS_TOKENIZER", "nltk")
+
+# Token kutip sisa tokenisasi yang dibuang
+JUNK_TOKENS = {'"', '`'}
+
+@lru_cache(maxsize=1)
+def load_nltk_tokenizers():
+    # Import & download data punkt hanya saat tokenizer nltk benar-benar dipakai
+    import nltk
+    from nltk.tokenize import sent_tokenize, word_tokenize
+    try:
+        sent_tokenize("Tes.")
+    except LookupError:
+        nltk.download('punkt')
+        nltk.download('punkt_tab')
+    return sent_tokenize, word_tokenize
+
+def iter_tokenized(text, tokenizer=None):
+    """
+    Generator (kalimat, list kata) dari teks yang sudah dibersihkan. Tokenizer
+    regex membaca teks secara streaming; Punkt (nltk) memecah kalimat sekaligus,
+    tetapi kata tetap ditokenisasi per kalimat saat dibutuhkan.
+    """
+    tokenizer = tokenizer or PREPROCESS_TOKENIZER
+    if tokenizer == "regex":
+        return folktale_tokenizer.iter_tokenize(text)
+    if tokenizer == "nltk":
+        sent_tokenize, word_tokenize = load_nltk_tokenizers()
+        return ((sentence, word_tokenize(sentence)) for sentence in sent_tokenize(text))
+    raise ValueError(f"Unknown tokenizer '{tokenizer}', expected one of {TOKENIZERS}")
+
+def tokenize_text(text, tokenizer=None):
+    """List (kalimat, list kata) dari teks yang sudah dibersihkan."""
+    return list(iter_tokenized(text, tokenizer))
 
 def clean_text(text):
     text = text.replace('\t', ' ')
@@ -20,22 +58,45 @@ def clean_text(text):
         text = text[1:-1]
     return text
 
-def preprocess_folktale(text, story_id="1", title="uploaded"):
-    cleaned_text = clean_text(text)
-    sentences = sent_tokenize(cleaned_text)
-
-    rows = []
-    for sent_id, sentence in enumerate(sentences):
-        words = word_tokenize(sentence)
-        for word in words:
-            rows.append({
-                'story_id': story_id,
-                'judul': title,
-                'sentence_id': sent_id,
-                'sentence': sentence,
-                'word': word
-            })
-
-    df = pd.DataFrame(rows)
-    df = df[~df['word'].isin(['"', '`'])]  # Remove junk quote tokens
-    return df
+def iter_sentences(text, tokenizer=None):
+    """Generator (sentence_id, kalimat, kata) untuk teks mentah, tanpa token kutip sisa."""
+    for sent_id, (sentence, tokens) in enumerate(iter_tokenized(clean_text(text), tokenizer)):
+        yield sent_id, sentence, [word for word in tokens if word not in JUNK_TOKENS]
+
+def _constant_column(value, length):
+    # Nilai integer jadi int32; selain itu categorical (Parquet hanya mempertahankan kategori string)
+    if isinstance(value, (int, np.integer)):
+        return np.full(length, value, dtype=np.int32)
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
+def preprocess_folktale(text, story_id="1", title="uploaded", tokenizer=None):
+    """
+    Tokenisasi satu cerita menjadi dua tabel:
+      - token   : story_id, judul (categorical / int32), sentence_id (int32), word — satu baris per kata
+      - kalimat : story_id, sentence_id, sentence (teks asli), text (kata digabung spasi,
+                  seperti teks yang dipakai saat training), n_words
+    Token merujuk ke kalimat lewat sentence_id, jadi teks kalimat hanya disimpan sekali.
+    """
+    words, word_sentence_ids = [], []
+    sentence_texts, joined_texts, n_words = [], [], []
+    for sent_id, sentence, kept in iter_sentences(text, tokenizer):
+        words.extend(kept)
+        word_sentence_ids.extend([sent_id] * len(kept))
+        sentence_texts.append(sentence)
+        joined_texts.append(" ".join(kept))
+        n_words.append(len(kept))
+
+    token_df = pd.DataFrame({
+        'story_id': _constant_column(story_id, len(words)),
+        'judul': _constant_column(title, len(words)),
+        'sentence_id': np.asarray(word_sentence_ids, dtype=np.int32),
+        'word': pd.Series(words, dtype=object),
+    })
+    sentence_df = pd.DataFrame({
+        'story_id': _constant_column(story_id, len(sentence_texts)),
+        'sentence_id': np.arange(len(sentence_texts), dtype=np.int32),
+        'sentence': pd.Series(sentence_texts, dtype=object),
+        'text': pd.Series(joined_texts, dtype=object),
+        'n_words': np.asarray(n_words, dtype=np.int32),
+    })
+    return token_df, sentence_df
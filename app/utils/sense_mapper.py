@@ -85,16 +85,31 @@ ORDINAL_PATTERN = re.compile(r'\bke(?:-?\d+|satu|dua|tiga|empat|lima|enam|tujuh|
 def normalize(text):
     return text.lower().strip()
 
+# === ROLE INDEX ===
+def compile_role_keywords(role_keywords):
+    """
+    Exact-match dict keyword -> role, dan index kata -> (urutan, role) untuk
+    keyword satu kata. Bila beberapa keyword cocok, keyword yang paling awal di
+    `role_keywords` tetap menang, sama seperti scan berurutan.
+    """
+    role_by_keyword, role_by_token = {}, {}
+    for rank, (keyword, role) in enumerate(role_keywords):
+        role_by_keyword.setdefault(keyword, role)
+        if keyword.split() == [keyword]:
+            role_by_token.setdefault(keyword, (rank, role))
+    return role_by_keyword, role_by_token
+
+ROLE_BY_KEYWORD, ROLE_BY_TOKEN = compile_role_keywords(ROLE_KEYWORDS)
+
 def get_role(alias):
     alias = normalize(alias)
-    for keyword, role in ROLE_KEYWORDS:
-        if alias == keyword:
-            return role
-    words = alias.split()
-    for keyword, role in ROLE_KEYWORDS:
-        if keyword in words:
-            return role
-    return None
+    if alias in ROLE_BY_KEYWORD:
+        return ROLE_BY_KEYWORD[alias]
+    matches = [ROLE_BY_TOKEN[word] for word in alias.split() if word in ROLE_BY_TOKEN]
+    return min(matches)[1] if matches else None
+
+def cluster_roles(aliases, alias_roles):
+    return {alias_roles[a] for a in aliases if alias_roles[a]}
 
 def has_exclusion_conflict(aliases_i, aliases_j):
     for a in aliases_i:
@@ -107,52 +122,98 @@ def has_exclusion_conflict(aliases_i, aliases_j):
 def contains_ordinal(alias):
     return bool(ORDINAL_PATTERN.search(normalize(alias)))
 
+# Satu bit per kata kunci eksklusi; konflik = kata kunci dan pasangannya ada di dua sisi berbeda
+EXCLUDE_BITS = {
+    keyword: 1 << bit
+    for bit, keyword in enumerate(dict.fromkeys(k for pair in EXCLUDE_KEYWORD_PAIRS for k in pair))
+}
+
+def exclusion_mask(aliases):
+    mask = 0
+    for keyword, bit in EXCLUDE_BITS.items():
+        if any(keyword in a for a in aliases):
+            mask |= bit
+    return mask
+
+def conflict_mask(mask):
+    """Bit kata kunci yang berkonflik dengan kata kunci di `mask`."""
+    partners = 0
+    for x, y in EXCLUDE_KEYWORD_PAIRS:
+        if mask & EXCLUDE_BITS[x]:
+            partners |= EXCLUDE_BITS[y]
+        if mask & EXCLUDE_BITS[y]:
+            partners |= EXCLUDE_BITS[x]
+    return partners
+
+# === MERGE ENGINE ===
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, root, other):
+        self.parent[self.find(other)] = self.find(root)
+
+def merge_story_clusters(clusters, alias_roles):
+    """
+    Gabungkan cluster satu cerita yang memiliki role set sama. Hasilnya sama
+    dengan perbandingan berpasangan berurutan: cluster i (urut naik) menyerap
+    setiap cluster j > i yang belum terpakai bila role sama, tidak ada ordinal,
+    dan tidak ada konflik eksklusi dengan alias yang sudah terkumpul.
+
+    Hanya cluster dalam bucket role set yang sama yang dibandingkan, dan
+    ordinal serta kata kunci eksklusi dihitung sekali per cluster.
+    """
+    alias_sets = [set(aliases) for aliases in clusters]
+    roles = [cluster_roles(aliases, alias_roles) for aliases in alias_sets]
+    masks = [exclusion_mask(aliases) for aliases in alias_sets]
+
+    # Cluster tanpa role atau dengan alias ordinal tidak pernah digabung
+    buckets = defaultdict(list)
+    for i, aliases in enumerate(alias_sets):
+        if roles[i] and not any(contains_ordinal(a) for a in aliases):
+            buckets[frozenset(roles[i])].append(i)
+
+    union_find = UnionFind(len(clusters))
+    for remaining in buckets.values():
+        while remaining:
+            root, mask, rest = remaining[0], masks[remaining[0]], []
+            for j in remaining[1:]:
+                if conflict_mask(mask) & masks[j]:
+                    rest.append(j)
+                else:
+                    union_find.union(root, j)
+                    mask |= masks[j]
+            remaining = rest
+
+    members = defaultdict(list)
+    for i in range(len(clusters)):
+        members[union_find.find(i)].append(i)
+
+    return [
+        {
+            "aliases": list(set().union(*(alias_sets[j] for j in group))),
+            "role": next(iter(roles[root])) if roles[root] else None
+        }
+        for root, group in members.items()
+    ]
+
 # === MAIN FUNCTION ===
 def apply_role_based_merging(df_cluster_input: pd.DataFrame) -> pd.DataFrame:
     df = df_cluster_input.copy()
     df["aliases"] = df["aliases"].apply(lambda x: [normalize(a) for a in x])
 
-    grouped = defaultdict(list)
-    for _, row in df.iterrows():
-        grouped[row['story_id']].append({
-            'person': row['person'],
-            'aliases': row['aliases']
-        })
+    # Role dihitung sekali per alias unik dan sekali per cluster
+    alias_roles = {a: get_role(a) for aliases in df["aliases"] for a in aliases}
 
     final_results = []
-    for story_id, clusters in grouped.items():
-        merged = []
-        visited = [False] * len(clusters)
-
-        for i in range(len(clusters)):
-            if visited[i]:
-                continue
-
-            current_aliases = set(clusters[i]['aliases'])
-            merged_indices = [i]
-            roles_i = {get_role(a) for a in current_aliases if get_role(a)}
-
-            for j in range(i + 1, len(clusters)):
-                if visited[j]:
-                    continue
-
-                other_aliases = set(clusters[j]['aliases'])
-                roles_j = {get_role(a) for a in other_aliases if get_role(a)}
-
-                if any(contains_ordinal(a) for a in current_aliases | other_aliases):
-                    continue
-
-                if roles_i and roles_i == roles_j and not has_exclusion_conflict(current_aliases, other_aliases):
-                    current_aliases |= other_aliases
-                    visited[j] = True
-                    merged_indices.append(j)
-
-            merged.append({
-                "aliases": list(current_aliases),
-                "role": next(iter(roles_i)) if roles_i else None
-            })
-            for idx in merged_indices:
-                visited[idx] = True
+    for story_id, story_df in df.groupby("story_id", sort=False, dropna=False):
+        merged = merge_story_clusters(story_df["aliases"].tolist(), alias_roles)
 
         # Handle 'orang tua' alias
         orang_tua_alias = 'orang tua'
@@ -0,0 +1,351 @@
+# utils/streaming.py
+"""
+Mode streaming untuk cerita yang sangat panjang. Cerita dibaca sebagai
+generator jendela kalimat (STREAM_WINDOW_SENTENCES kalimat) dalam tiga pass:
+
+  1. NER per jendela; yang disimpan hanya (alias ternormalisasi, sentence_id)
+     per mention dan jumlah kata per kalimat.
+  2. Clustering + role merging (kecil), lalu satu scan untuk mention_count per
+     Tokoh dan batas MinMaxScaler, sama seperti add_features_for_classification.
+  3. Baris fitur dibangun, di-scale dan diklasifikasi per jendela, lalu langsung
+     dilipat ke agregat per Tokoh untuk majority / confidence-weighted vote.
+
+Token, hasil NER lengkap, baris enriched (text_prev/text_next/bert_context) dan
+prediksi per kalimat tidak pernah dimaterialisasi untuk seluruh cerita, jadi
+memori puncak mengikuti ukuran jendela, bukan panjang cerita. Hasil `final`
+sama dengan run_story.
+"""
+
+import os
+import sys
+from array import array
+from collections import Counter, defaultdict
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.alias_matcher import AliasMatcher, is_word_bounded, count_empty_alias_matches
+from utils.preprocessing import iter_sentences
+from utils.pipeline import CLASSIFIERS, stage_configs, stage_cluster, stage_role_merge
+
+STREAM_WINDOW = int(os.environ.get("STREAM_WINDOW_SENTENCES", "64"))
+
+SCALED_COLUMNS = ["mention_count", "word_count"]
+
+# === WINDOWS ===
+def iter_windows(story_text, window=STREAM_WINDOW, tokenizer=None):
+    """List berisi paling banyak `window` kalimat (sentence_id, kalimat, kata)."""
+    sentences = iter_sentences(story_text, tokenizer)
+    while True:
+        chunk = list(islice(sentences, window))
+        if not chunk:
+            return
+        yield chunk
+
+def _with_next(windows):
+    # (jendela, jendela berikutnya atau None): konteks text_next butuh satu kalimat ke depan
+    current = next(windows, None)
+    while current is not None:
+        following = next(windows, None)
+        yield current, following
+        current = following
+
+# === PASS 1: NER ===
+def stream_characters(story_text, window=STREAM_WINDOW, tokenizer=None, ner_backend=None):
+    """
+    Kembalikan (character_df ringkas: Normalized, sentence_id; array jumlah kata
+    per sentence_id). sentence_id NER adalah urutan kalimat yang bertoken, sama
+    seperti stage_ner.
+    """
+    from utils.predict import extract_characters
+
+    names, mention_ids, n_words = [], array("q"), array("q")
+    offset = 0
+    for chunk in iter_windows(story_text, window, tokenizer):
+        n_words.extend(len(words) for _, _, words in chunk)
+        token_lists = [words for _, _, words in chunk if words]
+        if not token_lists:
+            continue
+        found = extract_characters(token_lists, backend=ner_backend)
+        if not found.empty:
+            names.extend(sys.intern(n) if isinstance(n, str) else n for n in found["Normalized"])
+            mention_ids.extend(int(i) + offset for i in found["sentence_id"])
+        offset += len(token_lists)
+
+    character_df = pd.DataFrame({"Normalized": names, "sentence_id": np.frombuffer(mention_ids, dtype=np.int64)})
+    return character_df, n_words
+
+# === PASS 2: MENTION COUNTS & SCALER ===
+class StoryFeatures:
+    """Alias per Tokoh dan automaton satu cerita, disiapkan seperti di feature_engineering."""
+
+    def __init__(self, merged_df):
+        self.persons = list(merged_df.itertuples(index=False))
+        self.aliases = {row.person: [a.lower() for a in row.aliases] for row in self.persons}
+        self.alias_sets = {row.person: {a.lower().strip() for a in row.aliases} for row in self.persons}
+
+        variants = set()
+        for row in self.persons:
+            for a in row.aliases:
+                variants.update((a.lower(), a.lower().strip()))
+        self.matcher = AliasMatcher(variants)
+
+        all_aliases = set().union(*self.alias_sets.values()) if self.alias_sets else set()
+        self.single = {al for al in all_aliases if len(al.split()) == 1}
+        self.multi = [al for al in all_aliases if al and len(al.split()) > 1]
+        self.multi_matcher = AliasMatcher(self.multi)
+        self.carry = max(map(len, self.multi), default=0) + 1
+
+    def scan(self, sentence):
+        """(alias yang muncul sebagai substring, alias yang cocok sebagai kata utuh) dalam kalimat lowercase."""
+        substring, bounded = set(), set()
+        for start, end, al in self.matcher.finditer(sentence):
+            substring.add(al)
+            if is_word_bounded(sentence, start, end):
+                bounded.add(al)
+        return substring, bounded
+
+def count_mentions(story_text, features, window=STREAM_WINDOW, tokenizer=None):
+    """
+    mention_count per Tokoh atas gabungan semua kalimat (termasuk alias multi-kata
+    yang melintasi batas kalimat) dan set Tokoh yang punya minimal satu baris fitur.
+    """
+    token_counts, multi_counts, last_end = Counter(), Counter(), {}
+    boundaries, has_sentences, hit_aliases = 0, False, set()
+    tail, story_len = "", 0
+
+    for chunk in iter_windows(story_text, window, tokenizer):
+        for _, _, words in chunk:
+            if not words:
+                continue
+            has_sentences = True
+            lowered = [w.lower() for w in words]
+            token_counts.update(w for w in lowered if w in features.single)
+            sentence = " ".join(words).lower()
+            boundaries += count_empty_alias_matches(sentence)
+            hit_aliases.update(features.scan(sentence)[0])
+
+            # Alias multi-kata dihitung pada teks cerita utuh: sisa teks sebelumnya
+            # ikut di-scan agar kecocokan lintas kalimat tidak terlewat
+            text = f"{tail} {sentence}" if story_len else sentence
+            base = story_len - len(tail)
+            for start, end, al in features.multi_matcher.finditer(text):
+                if end <= len(tail) or base + start < last_end.get(al, 0):
+                    continue
+                if is_word_bounded(text, start, end):
+                    multi_counts[al] += 1
+                    last_end[al] = base + end
+            story_len += len(text) - len(tail)
+            tail = text[-features.carry:]
+
+    mention_counts, with_rows = {}, set()
+    for person, alias_set in features.alias_sets.items():
+        cnt = 0
+        for al in alias_set:
+            if len(al.split()) == 1:
+                cnt += token_counts[al]
+            elif al:
+                cnt += multi_counts[al]
+            else:
+                cnt += boundaries
+        mention_counts[person] = cnt
+
+        aliases = features.aliases[person]
+        if ("" in aliases and has_sentences) or hit_aliases.intersection(aliases):
+            with_rows.add(person)
+    return mention_counts, with_rows
+
+def fit_scaler(features, mention_counts, word_counts, with_rows):
+    """MinMaxScaler dengan min/max yang sama seperti fit_transform atas semua baris fitur."""
+    persons = [row.person for row in features.persons if row.person in with_rows]
+    values = pd.DataFrame({
+        "mention_count": [mention_counts[p] for p in persons],
+        "word_count": [word_counts[p] for p in persons],
+    })
+    return MinMaxScaler().fit(values)
+
+# === PASS 3: FEATURES PER WINDOW ===
+def iter_feature_windows(story_text, story_id, features, mention_counts, word_counts, scaler,
+                         window=STREAM_WINDOW, tokenizer=None):
+    """Generator DataFrame fitur (kolom sama dengan stage_features) per jendela kalimat."""
+    previous = ""
+    for chunk, following in _with_next(iter_windows(story_text, window, tokenizer)):
+        texts = {sid: " ".join(words) for sid, _, words in chunk if words}
+        if following:
+            first_sid, _, first_words = following[0]
+            if first_words:
+                texts[first_sid] = " ".join(first_words)
+        first_sid = chunk[0][0]
+        if previous:
+            texts[first_sid - 1] = previous
+
+        scanned = {}
+        for sid, _, words in chunk:
+            if words:
+                sentence = texts[sid].lower()
+                scanned[sid] = (sentence, *features.scan(sentence))
+
+        rows = []
+        for row in features.persons:
+            aliases = features.aliases[row.person]
+            for sid, (sentence, substring, bounded) in scanned.items():
+                if "" not in aliases and not substring.intersection(aliases):
+                    continue
+                is_primary = 1 if bounded.intersection(aliases) else 0
+                if not is_primary and "" in aliases and count_empty_alias_matches(sentence):
+                    is_primary = 1
+                rows.append({
+                    "story_id"   : story_id,
+                    "person"     : row.person,
+                    "aliases"    : row.aliases,
+                    "sentence_id": sid,
+                    "text"       : sentence,
+                    "mention_count": mention_counts[row.person],
+                    "word_count"   : word_counts[row.person],
+                    "is_primary_in_sentence": is_primary,
+                    "text_prev"  : texts.get(sid - 1, ""),
+                    "text_next"  : texts.get(sid + 1, ""),
+                })
+
+        previous = " ".join(chunk[-1][2])
+        if not rows:
+            continue
+
+        df = pd.DataFrame(rows)
+        df["bert_context"] = df["text_prev"] + " [SEP] " + df["text"] + " [SEP] " + df["text_next"]
+        df = df[["story_id", "person", "aliases", "sentence_id", "text", "mention_count", "word_count",
+                 "is_primary_in_sentence", "text_prev", "text_next", "bert_context"]]
+        df[SCALED_COLUMNS] = scaler.transform(df[SCALED_COLUMNS])
+        yield df
+
+# === VOTE AGGREGATES ===
+def _kahan_add(state, key, value):
+    # Penjumlahan terkompensasi, sama dengan groupby().sum() pandas untuk kolom float
+    total, compensation = state.get(key, (0.0, 0.0))
+    y = value - compensation
+    t = total + y
+    compensation = t - total - y
+    if compensation != compensation:
+        compensation = 0.0
+    state[key] = (t, compensation)
+
+class MajorityTotals:
+    """Agregat per Tokoh untuk utils.majority_vote.label_characters."""
+
+    FLOAT_COLUMNS = {"pro_conf_total": "conf_Protagonis", "ant_conf_total": "conf_Antagonis",
+                     "mention_total": "mention_count"}
+    LABEL_COLUMNS = {"pro_cnt": "Protagonis", "ant_cnt": "Antagonis", "oth_cnt": "Lainnya"}
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+        self.totals = {col: {} for col in self.FLOAT_COLUMNS}
+        self.aliases = {}
+
+    def add(self, pred_df):
+        for row in pred_df.itertuples(index=False):
+            key = (row.story_id, row.person)
+            self.counts[key][row.predicted_type] += 1
+            for col, source in self.FLOAT_COLUMNS.items():
+                _kahan_add(self.totals[col], key, float(getattr(row, source)))
+            self.aliases.setdefault(key, row.aliases)
+
+    def vote(self):
+        from utils.majority_vote import majority_vote_from_aggregates
+        keys = sorted(self.counts)
+        agg = pd.DataFrame({
+            "story_id": [k[0] for k in keys],
+            "person"  : [k[1] for k in keys],
+            **{col: np.array([self.counts[k][label] for k in keys], dtype="int64")
+               for col, label in self.LABEL_COLUMNS.items()},
+            **{col: np.array([self.totals[col][k][0] for k in keys], dtype=float)
+               for col in self.FLOAT_COLUMNS},
+        })
+        aliases = pd.DataFrame({"story_id": agg["story_id"], "person": agg["person"],
+                                "aliases": [self.aliases[k] for k in keys]})
+        return majority_vote_from_aggregates(agg, aliases)["final"]
+
+class ConfidenceTotals:
+    """Total confidence per Tokoh untuk utils.confidence_vote.confidence_weighted_vote."""
+
+    LABELS = ("Lainnya", "Protagonis", "Antagonis")
+
+    def __init__(self, person_order):
+        self.person_order = person_order
+        self.totals = {}
+        self.aliases = {}
+
+    def add(self, pred_df):
+        for row in pred_df.itertuples(index=False):
+            key = (row.story_id, row.person)
+            totals = self.totals.setdefault(key, [0.0] * len(self.LABELS))
+            for i, label in enumerate(self.LABELS):
+                totals[i] += float(getattr(row, f"conf_{label}"))
+            self.aliases.setdefault(key, row.aliases)
+
+    def vote(self):
+        from utils.confidence_vote import confidence_weighted_vote
+        # Satu baris per Tokoh berisi totalnya, urut seperti kemunculan pertama di run_story
+        keys = sorted(self.totals, key=lambda k: self.person_order[k[1]])
+        return confidence_weighted_vote(pd.DataFrame({
+            "story_id": [k[0] for k in keys],
+            "person"  : [k[1] for k in keys],
+            **{f"conf_{label}": [self.totals[k][i] for k in keys] for i, label in enumerate(self.LABELS)},
+            "aliases" : [self.aliases[k] for k in keys],
+        }))
+
+# === FULL PIPELINE ===
+def run_story_streaming(story_text, story_id=1, classifier="classical", ner_backend=None,
+                        quantize=None, tokenizer=None, window=STREAM_WINDOW):
+    """
+    Seperti utils.pipeline.run_story, tetapi per jendela kalimat dan tanpa cache.
+
+    Returns:
+        dict berisi DataFrame: characters (Normalized, sentence_id), clusters,
+        merged dan final.
+    """
+    if classifier not in CLASSIFIERS:
+        raise ValueError(f"Unknown classifier '{classifier}', expected one of {CLASSIFIERS}")
+
+    configs = stage_configs(story_id, classifier=classifier, ner_backend=ner_backend,
+                            quantize=quantize, tokenizer=tokenizer)
+    ner_backend = configs["ner"]["ner_backend"]
+    tokenizer = configs["preprocess"]["tokenizer"]
+    quantize = configs[f"classify_{classifier}"]["quantize"]
+    r = {}
+
+    r["characters"], n_words = stream_characters(story_text, window, tokenizer, ner_backend)
+    if r["characters"].empty:
+        r.update(clusters=pd.DataFrame(), merged=pd.DataFrame(), final=pd.DataFrame())
+        return r
+
+    r["clusters"] = stage_cluster(r["characters"], story_id)
+    r["merged"] = stage_role_merge(r["clusters"], r["characters"])
+
+    features = StoryFeatures(r["merged"])
+    mention_counts, with_rows = count_mentions(story_text, features, window, tokenizer)
+    if not with_rows:
+        r["final"] = pd.DataFrame()
+        return r
+    word_counts = {
+        row.person: sum(n_words[s] if 0 <= s < len(n_words) else 0 for s in row.sentence_ids)
+        for row in features.persons
+    }
+    scaler = fit_scaler(features, mention_counts, word_counts, with_rows)
+
+    if classifier == "classical":
+        from utils.classical_classifier import classify_characters
+        totals = MajorityTotals()
+        classify = classify_characters
+    else:
+        from utils.bert_classifier import classify_characters
+        totals = ConfidenceTotals({row.person: i for i, row in enumerate(features.persons)})
+        classify = lambda df: classify_characters(df, quantize=quantize)
+
+    for enriched in iter_feature_windows(story_text, story_id, features, mention_counts, word_counts,
+                                         scaler, window, tokenizer):
+        totals.add(classify(enriched))
+
+    r["final"] = totals.vote()
+    return r
@@ -0,0 +1,108 @@
+# utils/tokenization.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from transformers import AutoTokenizer
+
+# Jumlah maksimum encoding (per teks) yang disimpan di cache LRU
+CACHE_SIZE = 50_000
+
+# === SHARED FAST TOKENIZER ===
+@lru_cache(maxsize=None)
+def get_fast_tokenizer(source):
+    """
+    Satu instance tokenizer cepat (berbasis Rust) per model/folder,
+    dipakai bersama oleh tahap NER dan klasifikasi.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(source, use_fast=True)
+    if not tokenizer.is_fast:
+        raise ValueError(f"No fast tokenizer available for '{source}'")
+    return tokenizer
+
+# === ENCODING CACHE ===
+class EncodingCache:
+    """Cache LRU berukuran terbatas untuk token ID, dengan key hash teks."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+ENCODING_CACHE = EncodingCache()
+
+def _cache_key(tokenizer, text):
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    return tokenizer.name_or_path, digest
+
+# === BATCH ENCODING ===
+def encode_texts(tokenizer, texts):
+    """
+    Token ID (tanpa special token) untuk setiap teks. Teks yang sudah pernah
+    di-encode diambil dari cache; sisanya di-tokenisasi sekaligus dalam satu batch.
+    """
+    keys = [_cache_key(tokenizer, text) for text in texts]
+    ids = [ENCODING_CACHE.get(key) for key in keys]
+
+    missing = {key: text for key, text, value in zip(keys, texts, ids) if value is None}
+    if missing:
+        encoded = tokenizer(list(missing.values()), add_special_tokens=False)["input_ids"]
+        fresh = {key: tuple(e) for key, e in zip(missing, encoded)}
+        for key, value in fresh.items():
+            ENCODING_CACHE.put(key, value)
+        ids = [fresh[key] if value is None else value for key, value in zip(keys, ids)]
+
+    return ids
+
+def encode_segments(tokenizer, texts, sep=" [SEP] ", max_length=128):
+    """
+    Encode teks berformat "prev [SEP] text [SEP] next" dengan menyusun ulang
+    encoding per segmen. Kalimat yang muncul di banyak konteks (kalimat
+    sebelum/sesudah, atau beberapa tokoh di kalimat yang sama) cukup
+    ditokenisasi sekali.
+
+    Hasilnya sama dengan tokenizer(text, truncation=True, max_length=max_length),
+    karena WordPiece BERT memecah teks per spasi/tanda baca sebelum tokenisasi.
+    """
+    segments = [text.split(sep) for text in texts]
+    unique = list(dict.fromkeys(seg for segs in segments for seg in segs))
+    lookup = dict(zip(unique, encode_texts(tokenizer, unique)))
+
+    cls_id, sep_id = tokenizer.cls_token_id, tokenizer.sep_token_id
+    encoded = []
+    for segs in segments:
+        body = list(lookup[segs[0]])
+        for seg in segs[1:]:
+            body.append(sep_id)
+            body.extend(lookup[seg])
+        encoded.append([cls_id] + body[:max_length - 2] + [sep_id])
+    return encoded